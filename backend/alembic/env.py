@@ -14,6 +14,7 @@ from app.core.database import Base
 import app.models.user
 import app.models.category
 import app.models.product
+import app.models.dashboard
 
 config = context.config
 
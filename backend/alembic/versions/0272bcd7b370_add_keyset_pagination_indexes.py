@@ -0,0 +1,32 @@
+"""add keyset pagination indexes
+
+Revision ID: 0272bcd7b370
+Revises: 15332dfb086f
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0272bcd7b370'
+down_revision: Union[str, Sequence[str], None] = '15332dfb086f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False)
+    op.create_index('ix_products_category_id_name_id', 'products', ['category_id', 'name', 'id'], unique=False)
+    op.create_index('ix_categories_name_id', 'categories', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_categories_name_id', table_name='categories')
+    op.drop_index('ix_products_category_id_name_id', table_name='products')
+    op.drop_index('ix_products_name_id', table_name='products')
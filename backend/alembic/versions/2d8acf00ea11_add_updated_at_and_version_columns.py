@@ -0,0 +1,35 @@
+"""add updated_at and version columns
+
+Revision ID: 2d8acf00ea11
+Revises: ceff3e0b5e23
+Create Date: 2026-10-18 14:12:40.318262
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8acf00ea11'
+down_revision: Union[str, Sequence[str], None] = 'ceff3e0b5e23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('categories', 'products', 'users')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Os server_default preenchem as linhas existentes: version=1, updated_at=momento da migração
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, 'version')
+        op.drop_column(table, 'updated_at')
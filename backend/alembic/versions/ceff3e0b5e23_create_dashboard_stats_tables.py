@@ -0,0 +1,63 @@
+"""create dashboard stats tables
+
+Revision ID: ceff3e0b5e23
+Revises: 32ebd9c6920e
+Create Date: 2026-10-18 11:26:05.871342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ceff3e0b5e23'
+down_revision: Union[str, Sequence[str], None] = '32ebd9c6920e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dashboard_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_products', sa.Integer(), nullable=False),
+    sa.Column('total_categories', sa.Integer(), nullable=False),
+    sa.Column('total_stock_value', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('low_stock_count', sa.Integer(), nullable=False),
+    sa.Column('uncategorized_products', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('dashboard_category_stats',
+    sa.Column('category_id', sa.String(length=36), nullable=False),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('category_id')
+    )
+    op.create_index(op.f('ix_products_stock'), 'products', ['stock'], unique=False)
+
+    # Materializa os agregados a partir dos dados já existentes
+    op.execute("""
+        INSERT INTO dashboard_stats
+            (id, total_products, total_categories, total_stock_value, low_stock_count, uncategorized_products)
+        SELECT
+            1,
+            (SELECT count(*) FROM products),
+            (SELECT count(*) FROM categories),
+            (SELECT coalesce(sum(price * stock), 0) FROM products),
+            (SELECT count(*) FROM products WHERE stock < 10),
+            (SELECT count(*) FROM products WHERE category_id IS NULL)
+    """)
+    op.execute("""
+        INSERT INTO dashboard_category_stats (category_id, product_count)
+        SELECT c.id, count(p.id)
+        FROM categories c LEFT JOIN products p ON p.category_id = c.id
+        GROUP BY c.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_products_stock'), table_name='products')
+    op.drop_table('dashboard_category_stats')
+    op.drop_table('dashboard_stats')
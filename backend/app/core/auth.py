@@ -1,4 +1,7 @@
-from functools import lru_cache
+import asyncio
+import hashlib
+import time
+from collections.abc import Callable
 from typing import Any
 
 import httpx
@@ -6,7 +9,9 @@ import structlog
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwk, jwt
-from jose.utils import base64url_decode
+from jose.backends.base import Key
+
+from app.core.cache import _MISSING, InMemoryCacheBackend
 
 log = structlog.get_logger("auth")
 
@@ -18,42 +23,212 @@ JWKS_URL = f"{ISSUER}/protocol/openid-connect/certs"
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-@lru_cache(maxsize=1)
-def _get_jwks() -> list[dict]:
-    try:
-        response = httpx.get(JWKS_URL, timeout=5)
-        response.raise_for_status()
-        return response.json()["keys"]
-    except Exception as exc:
-        log.error("auth.jwks_fetch_failed", error=str(exc))
-        return []
+class JWKSManager:
+    """Cache local das chaves públicas do Keycloak, indexadas por `kid`.
+
+    - As chaves já ficam construídas (jwk.construct) — nada é parseado por request.
+    - Depois de `ttl` segundos as chaves são renovadas em background; quem está
+      validando um token continua usando as chaves atuais enquanto isso.
+    - Buscas simultâneas compartilham a mesma requisição ao Keycloak (single-flight).
+    - Um `kid` desconhecido só provoca nova busca se a última tentativa tiver mais de
+      `min_refresh_interval` segundos — tokens forjados com kids aleatórios não
+      conseguem transformar cada request numa chamada ao Keycloak.
+    - Falhas de rede mantêm as chaves que já estavam em memória.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl: float = 300.0,
+        min_refresh_interval: float = 30.0,
+        timeout: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._clock = clock
+        self._keys: dict[str, Key] = {}
+        self._fetched_at: float | None = None
+        self._last_attempt: float | None = None
+        self._inflight: asyncio.Task | None = None
+        self._background: asyncio.Task | None = None
+        self.fetch_count = 0
+
+    @property
+    def kids(self) -> set[str]:
+        return set(self._keys)
+
+    def _is_stale(self) -> bool:
+        return self._fetched_at is None or self._clock() - self._fetched_at >= self.ttl
+
+    def _may_refresh(self) -> bool:
+        return self._last_attempt is None or self._clock() - self._last_attempt >= self.min_refresh_interval
+
+    async def get_key(self, kid: str | None) -> Key | None:
+        key = self._keys.get(kid) if kid else None
+        if key is not None:
+            if self._is_stale() and self._may_refresh():
+                self._refresh_in_background()
+            return key
+
+        if kid is None or not self._may_refresh():
+            return None
+        # kid desconhecido: pode ser rotação de chave no Keycloak
+        await self.refresh()
+        return self._keys.get(kid)
+
+    async def refresh(self) -> None:
+        """Busca o JWKS; chamadas concorrentes aguardam a mesma busca."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+        await asyncio.shield(self._inflight)
+
+    def _refresh_in_background(self) -> None:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+
+    async def _fetch(self) -> None:
+        self._last_attempt = self._clock()
+        self.fetch_count += 1
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(self.url)
+                response.raise_for_status()
+                keys_data = response.json()["keys"]
+        except Exception as exc:
+            log.error("auth.jwks_fetch_failed", error=str(exc), cached_keys=len(self._keys))
+            return
+        self.load(keys_data)
+
+    def load(self, keys_data: list[dict[str, Any]]) -> None:
+        """Constrói e instala as chaves de um JWKS (lista `keys`)."""
+        keys: dict[str, Key] = {}
+        for key_data in keys_data:
+            kid = key_data.get("kid")
+            if not kid or key_data.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[kid] = jwk.construct(key_data, algorithm=key_data.get("alg", "RS256"))
+            except Exception as exc:
+                log.warning("auth.jwk_invalid", kid=kid, error=str(exc))
+
+        if not keys:
+            log.error("auth.jwks_empty", cached_keys=len(self._keys))
+            return
+        rotated = set(keys) != set(self._keys)
+        self._keys = keys
+        self._fetched_at = self._clock()
+        if rotated:
+            log.info("auth.jwks_refreshed", kids=sorted(keys))
+
+    def start(self) -> None:
+        """Inicia a renovação periódica (chamado no startup do app)."""
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._background, self._inflight) if t is not None and not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._background = self._inflight = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            # Logo após o warmup as chaves já estão frescas: não busca de novo
+            if self._is_stale() and self._may_refresh():
+                await self.refresh()
+            await asyncio.sleep(self.ttl if self._keys else self.min_refresh_interval)
+
+
+jwks_manager = JWKSManager(JWKS_URL)
+
+
+class VerifiedTokenCache:
+    """Claims de tokens já validados, indexados pelo SHA-256 do token, até o `exp`.
+
+    O frontend reusa o mesmo access token por minutos; sem o cache cada request
+    refaz a verificação RS256. Só entram tokens que passaram pelo jwt.decode e
+    têm `exp` — o token em si nunca é guardado, apenas o hash.
+    """
+
+    def __init__(self, maxsize: int = 10_000, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._backend = InMemoryCacheBackend(maxsize=maxsize, clock=clock)
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.verifications = 0
+        self.verify_seconds = 0.0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        if not self.enabled:
+            return None
+        claims = self._backend.get(self._key(token))
+        if claims is _MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(claims)
+
+    def put(self, token: str, claims: dict, verify_seconds: float) -> None:
+        self.verifications += 1
+        self.verify_seconds += verify_seconds
+        exp = claims.get("exp")
+        if not self.enabled or not isinstance(exp, (int, float)):
+            return
+        ttl = exp - self._clock()
+        if ttl > 0:
+            self._backend.set(self._key(token), dict(claims), ttl)
+
+    def clear(self) -> None:
+        self._backend.clear()
+        self.hits = self.misses = self.verifications = 0
+        self.verify_seconds = 0.0
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        avg_verify = self.verify_seconds / self.verifications if self.verifications else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_verify_ms": avg_verify * 1000,
+            # Estimativa: cada hit economizou uma verificação de custo médio
+            "time_saved_seconds": self.hits * avg_verify,
+            "size": len(self._backend),
+        }
 
 
-def _get_public_key(token: str) -> Any:
-    header = jwt.get_unverified_header(token)
-    kid = header.get("kid")
-    keys = _get_jwks()
-    for key_data in keys:
-        if key_data.get("kid") == kid:
-            return jwk.construct(key_data)
-    return None
+token_cache = VerifiedTokenCache()
 
 
-def verify_token(token: str) -> dict:
+async def verify_token(token: str) -> dict:
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
     try:
-        public_key = _get_public_key(token)
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = await jwks_manager.get_key(kid)
         if public_key is None:
-            _get_jwks.cache_clear()
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Chave pública não encontrada. Tente novamente.",
             )
+        started = time.perf_counter()
         payload = jwt.decode(
             token,
             public_key,
             algorithms=["RS256"],
             options={"verify_aud": False},
         )
+        token_cache.put(token, payload, time.perf_counter() - started)
         return payload
     except JWTError as exc:
         log.warning("auth.token_invalid", error=str(exc))
@@ -64,7 +239,7 @@ def verify_token(token: str) -> dict:
         )
 
 
-def require_auth(
+async def require_auth(
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
 ) -> dict:
     if credentials is None:
@@ -73,4 +248,4 @@ def require_auth(
             detail="Autenticação necessária.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return verify_token(credentials.credentials)
+    return await verify_token(credentials.credentials)
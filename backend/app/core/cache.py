@@ -0,0 +1,188 @@
+"""
+Cache de leitura em processo, com TTL por recurso e limite LRU.
+
+As chaves seguem o formato "<recurso>:<chave>" (ex.: "categories:item:<id>").
+Quem escreve no banco (camada CRUD) invalida exatamente as chaves que afetou,
+depois do commit.
+
+O armazenamento fica atrás de CacheBackend para que um store compartilhado
+(Redis, memcached) possa substituir o InMemoryCacheBackend. Enquanto o backend
+for em memória, cada worker tem o seu cache: uma escrita invalida só o worker
+que a atendeu, e os demais enxergam o valor antigo por no máximo o TTL do recurso.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Retorna o valor ou _MISSING."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None: ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def count_prefix(self, prefix: str) -> int:
+        with self._lock:
+            return sum(1 for key in self._data if key.startswith(prefix))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class Cache:
+    def __init__(self, backend: CacheBackend, ttls: dict[str, float], default_ttl: float = 30.0):
+        self.backend = backend
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        # Custo dos loaders nos misses: base da estimativa de tempo economizado pelos hits
+        self.loads: dict[str, int] = {}
+        self.load_seconds: dict[str, float] = {}
+
+    def get_or_set(self, resource: str, key: str, loader: Callable[[], Any]) -> Any:
+        """Busca no cache; em caso de miss chama loader(). Resultados None não são cacheados."""
+        full_key = f"{resource}:{key}"
+        value = self.backend.get(full_key)
+        if value is not _MISSING:
+            self.hits[resource] = self.hits.get(resource, 0) + 1
+            return value
+
+        self.misses[resource] = self.misses.get(resource, 0) + 1
+        started = time.perf_counter()
+        value = loader()
+        self.record_load(resource, time.perf_counter() - started)
+        if value is not None:
+            self.backend.set(full_key, value, self.ttls.get(resource, self.default_ttl))
+        return value
+
+    async def get_or_set_async(self, resource: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Versão de get_or_set para loaders async (rotas com AsyncSession)."""
+        value = self.get(resource, key)
+        if value is None:
+            started = time.perf_counter()
+            value = await loader()
+            self.record_load(resource, time.perf_counter() - started)
+            self.set(resource, key, value)
+        return value
+
+    def record_load(self, resource: str, seconds: float) -> None:
+        """Registra quanto custou carregar um valor após um miss (para quem usa get/set diretamente)."""
+        self.loads[resource] = self.loads.get(resource, 0) + 1
+        self.load_seconds[resource] = self.load_seconds.get(resource, 0.0) + seconds
+
+    def get(self, resource: str, key: str) -> Any:
+        """Só a consulta (conta hit/miss). None em caso de miss."""
+        value = self.backend.get(f"{resource}:{key}")
+        if value is _MISSING:
+            self.misses[resource] = self.misses.get(resource, 0) + 1
+            return None
+        self.hits[resource] = self.hits.get(resource, 0) + 1
+        return value
+
+    def set(self, resource: str, key: str, value: Any) -> None:
+        if value is not None:
+            self.backend.set(f"{resource}:{key}", value, self.ttls.get(resource, self.default_ttl))
+
+    def invalidate(self, resource: str, *keys: str) -> None:
+        self.backend.delete(*(f"{resource}:{key}" for key in keys))
+
+    def invalidate_prefix(self, resource: str, prefix: str = "") -> None:
+        self.backend.delete_prefix(f"{resource}:{prefix}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.hits.clear()
+        self.misses.clear()
+        self.loads.clear()
+        self.load_seconds.clear()
+
+    def resource_stats(self, resource: str) -> dict[str, float]:
+        hits, misses = self.hits.get(resource, 0), self.misses.get(resource, 0)
+        loads = self.loads.get(resource, 0)
+        avg_load = self.load_seconds.get(resource, 0.0) / loads if loads else 0.0
+        count_prefix = getattr(self.backend, "count_prefix", None)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "avg_load_ms": avg_load * 1000,
+            # Estimativa: cada hit economizou um carregamento de custo médio
+            "time_saved_seconds": hits * avg_load,
+            "size": count_prefix(f"{resource}:") if count_prefix else 0,
+        }
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        resources = set(self.hits) | set(self.misses)
+        return {r: self.resource_stats(r) for r in sorted(resources)}
+
+
+# Categorias quase nunca mudam; o dashboard é o que mais sofre com workers desatualizados.
+CACHE_TTLS = {
+    "categories": 300.0,
+    "products": 60.0,
+    "dashboard": 10.0,
+}
+
+cache = Cache(InMemoryCacheBackend(maxsize=2048), ttls=CACHE_TTLS)
@@ -0,0 +1,170 @@
+"""
+Requests condicionais (ETag / If-None-Match / If-Modified-Since) nas rotas de leitura.
+
+As rotas guardam no cache uma Representation: o corpo JSON já serializado junto
+com seus validadores. Se o If-None-Match do cliente bate com o ETag atual, a
+resposta é 304 sem corpo — nada é serializado e, com o cache quente, o banco
+nem é consultado. Com o cache frio, itens podem ser validados lendo só
+(version, updated_at) em vez da linha inteira.
+
+ETags de itens vêm da coluna version (ver app/models/mixins.py); listas e o
+dashboard usam o hash do corpo. Os dois são fortes: mesmo ETag ⇔ mesmos bytes.
+
+Nas escritas, If-Match com o ETag lido antes garante que o cliente está
+alterando a versão que viu; se não for mais a atual, a resposta é 412.
+"""
+
+import hashlib
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.cache import cache
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Representation:
+    body: bytes
+    etag: str
+    last_modified: datetime | None = None
+    headers: tuple[tuple[str, str], ...] = ()
+
+
+def version_etag(*versions: int) -> str:
+    """ETag a partir de versões de linha — mais de uma quando a resposta embute outra entidade."""
+    return '"' + ".".join(str(v) for v in versions) + '"'
+
+
+def content_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def json_representation(
+    body: bytes,
+    etag: str | None = None,
+    last_modified: datetime | None = None,
+    headers: Mapping[str, str] | None = None,
+) -> Representation:
+    """Sem `etag`, usa o hash do corpo. `headers` extras (ex.: X-Next-Cursor) vão também no 304."""
+    extra = tuple(
+        (k, v) for k, v in (headers or {}).items() if k.lower() not in ("content-length", "content-type")
+    )
+    return Representation(body, etag or content_etag(body), last_modified, extra)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite devolve datetimes sem fuso; gravamos sempre em UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Comparação fraca, como o RFC 9110 manda para If-None-Match."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def check_if_match(request: Request, etag: str) -> None:
+    """412 se o cliente enviou If-Match e a versão atual já é outra (comparação forte)."""
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return
+    if not any(tag.strip() == etag for tag in header.split(",")):
+        raise version_conflict(request)
+
+
+def version_conflict(request: Request) -> HTTPException:
+    """Escrita perdeu a corrida para outra: 412 se havia If-Match, 409 se não havia."""
+    if "if-match" in request.headers:
+        return HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="O recurso foi alterado por outra requisição. Busque a versão atual e tente de novo.",
+        )
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="O recurso foi alterado por outra requisição durante esta atualização. Tente de novo.",
+    )
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Com If-None-Match presente, If-Modified-Since é ignorado
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return _utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def cache_control_for(request: Request) -> str | None:
+    route = request.scope.get("route")
+    return settings.cache_control.get(getattr(route, "path", ""))
+
+
+def _validator_headers(request: Request, etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    cache_control = cache_control_for(request)
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return headers
+
+
+def conditional_response(request: Request, representation: Representation) -> Response:
+    """200 com o corpo pronto, ou 304 se o cliente já tem esta versão."""
+    headers = dict(representation.headers)
+    headers.update(_validator_headers(request, representation.etag, representation.last_modified))
+    if not_modified(request, representation.etag, representation.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=representation.body, media_type="application/json", headers=headers)
+
+
+async def cached_conditional_response(
+    request: Request,
+    resource: str,
+    key: str,
+    load: Callable[[], Awaitable[Representation | None]],
+    validators: Callable[[], Awaitable[tuple[str, datetime | None] | None]] | None = None,
+) -> Response | None:
+    """Serve `resource:key` do cache respeitando If-None-Match / If-Modified-Since.
+
+    Em caso de miss num request condicional, `validators` (se houver) devolve só
+    (etag, last_modified) do estado atual — se o cliente já o tem, responde 304
+    sem carregar nem cachear a representação. Retorna None se `load` não achar o recurso.
+    """
+    representation = cache.get(resource, key)
+    if representation is None:
+        if validators is not None and is_conditional(request):
+            current = await validators()
+            if current is not None and not_modified(request, *current):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED, headers=_validator_headers(request, *current)
+                )
+        started = time.perf_counter()
+        representation = await load()
+        cache.record_load(resource, time.perf_counter() - started)
+        if representation is None:
+            return None
+        cache.set(resource, key, representation)
+    return conditional_response(request, representation)
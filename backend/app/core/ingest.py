@@ -0,0 +1,102 @@
+"""
+Leitura incremental de corpos CSV / NDJSON.
+
+O corpo é consumido em chunks (request.stream()) e convertido em registros
+um a um — o arquivo inteiro nunca fica em memória.
+"""
+
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterator
+from typing import NamedTuple
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+class RawRecord(NamedTuple):
+    line: int
+    data: dict | None
+    error: str | None = None
+
+
+def detect_format(content_type: str | None) -> str | None:
+    if not content_type:
+        return None
+    return _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[RawRecord]:
+    line_no = 0
+    async for line in _iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield RawRecord(line_no, None, f"JSON inválido: {exc.msg}")
+            continue
+        if not isinstance(data, dict):
+            yield RawRecord(line_no, None, "Cada linha deve ser um objeto JSON.")
+            continue
+        yield RawRecord(line_no, data)
+
+
+async def _iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[RawRecord]:
+    header: list[str] | None = None
+    record = ""
+    record_line = line_no = 0
+    async for line in _iter_lines(chunks):
+        line_no += 1
+        if not record:
+            record_line = line_no
+            record = line
+        else:
+            record += "\n" + line
+        # Aspas desbalanceadas: o campo continua na próxima linha (quebra de linha dentro de aspas)
+        if record.count('"') % 2:
+            continue
+        current, record = record, ""
+        if not current.strip():
+            continue
+
+        values = next(csv.reader([current]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        if len(values) != len(header):
+            yield RawRecord(record_line, None, f"Esperadas {len(header)} colunas, encontradas {len(values)}.")
+            continue
+        # Célula vazia no CSV significa "sem valor"
+        yield RawRecord(record_line, {k: (v if v != "" else None) for k, v in zip(header, values)})
+
+    if record:
+        yield RawRecord(record_line, None, "Aspas não fechadas no fim do arquivo.")
+
+
+def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[RawRecord]:
+    if fmt == "csv":
+        return _iter_csv(chunks)
+    return _iter_ndjson(chunks)
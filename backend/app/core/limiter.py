@@ -1,4 +1,208 @@
+"""
+Rate limiting (slowapi sobre a biblioteca `limits`).
+
+Três peças configuráveis pelas settings:
+
+- RATE_LIMIT_STORAGE_URI: onde ficam os contadores. Com vários workers (ou
+  várias máquinas) use um store compartilhado — `redis://redis:6379/0` (requer
+  o pacote redis) — para que o limite seja global e não por processo. O padrão,
+  `local://`, é o LocalStorage abaixo: em memória, por processo.
+- RATE_LIMIT_STRATEGY: `sliding-window` (padrão, abaixo), ou as da própria
+  `limits`: `fixed-window`, `moving-window`.
+- TRUSTED_PROXIES: redes dos proxies (nginx) cujo X-Forwarded-For é confiável.
+  Atrás do nginx todo cliente chega com o IP do proxy; sem isso, todos
+  dividiriam o mesmo limite.
+"""
+
+import inspect
+import time
+from collections.abc import Callable, Iterable
+from ipaddress import ip_address, ip_network
+
+from limits import RateLimitItem
+from limits.storage import Storage
+from limits.strategies import STRATEGIES, RateLimiter
+from limits.util import WindowStats
 from slowapi import Limiter
-from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+from app.core.config import settings
+
+
+class ProxyAwareKey:
+    """key_func: IP do cliente, lendo X-Forwarded-For só quando a conexão vem de um proxy confiável.
+
+    O header é percorrido da direita para a esquerda (cada proxy acrescenta o
+    endereço de quem o chamou no fim) e o primeiro endereço que não é de um
+    proxy confiável é o cliente. Entradas à esquerda dele podem ter sido
+    escritas pelo próprio cliente e são ignoradas.
+    """
+
+    def __init__(self, trusted_proxies: Iterable[str] = ()):
+        self.networks = [ip_network(n, strict=False) for n in trusted_proxies]
+        # slowapi chama inspect.signature(key_func) a cada request; com __signature__
+        # pronto isso vira um getattr em vez de introspecção (ver benchmarks/limiter.py)
+        self.__signature__ = inspect.signature(self.__call__)
+
+    def is_trusted(self, host: str) -> bool:
+        try:
+            address = ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    def __call__(self, request: Request) -> str:
+        client = request.client.host if request.client else "127.0.0.1"
+        forwarded = request.headers.get("x-forwarded-for")
+        if not forwarded or not self.is_trusted(client):
+            return client
+        for hop in reversed(forwarded.split(",")):
+            hop = hop.strip()
+            try:
+                ip_address(hop)
+            except ValueError:
+                break  # entrada malformada: fica o último endereço válido
+            client = hop
+            if not self.is_trusted(hop):
+                break
+        return client
+
+
+class LocalStorage(Storage):
+    """Store em memória para os contadores, sem lock.
+
+    Todas as chamadas acontecem na thread do event loop (as rotas limitadas são
+    async), então não há acesso concorrente a proteger. Ao contrário do
+    MemoryStorage da `limits`, não sobe thread de expiração: chaves vencidas
+    são descartadas na leitura e numa varredura a cada `sweep_every` escritas.
+
+    Instâncias com o mesmo nome (`local://<nome>`) compartilham os contadores —
+    dois Limiters no mesmo processo se comportam como dois workers apontando
+    para o mesmo Redis. É assim que os testes exercitam o limite global.
+    """
+
+    STORAGE_SCHEME = ["local"]
+
+    _shared: dict[str, dict[str, list[float]]] = {}
+
+    def __init__(self, uri: str | None = None, wrap_exceptions: bool = False, sweep_every: int = 10_000, **options):
+        name = (uri or "local://").partition("://")[2]
+        # chave -> [contador, expira_em]
+        self.data = self._shared.setdefault(name, {})
+        self.sweep_every = int(sweep_every)
+        self._writes = 0
+        self.clock: Callable[[], float] = time.time
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        return ValueError
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        now = self.clock()
+        entry = self.data.get(key)
+        if entry is None or entry[1] <= now:
+            entry = self.data[key] = [0, now + expiry]
+        elif elastic_expiry:
+            entry[1] = now + expiry
+        entry[0] += amount
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self._sweep(now)
+        return int(entry[0])
+
+    def get(self, key: str) -> int:
+        entry = self.data.get(key)
+        if entry is None or entry[1] <= self.clock():
+            return 0
+        return int(entry[0])
+
+    def get_expiry(self, key: str) -> int:
+        entry = self.data.get(key)
+        return int(entry[1]) if entry else int(self.clock())
+
+    def check(self) -> bool:
+        return True
+
+    def reset(self) -> int:
+        count = len(self.data)
+        self.data.clear()
+        return count
+
+    def clear(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        for key in [k for k, (_, expires_at) in self.data.items() if expires_at <= now]:
+            del self.data[key]
+
+
+class SlidingWindowRateLimiter(RateLimiter):
+    """Janela deslizante aproximada por dois contadores de janela fixa.
+
+    Conta as hits da janela atual mais as da anterior ponderadas pela fração
+    dela que ainda cai nos últimos `período` segundos. Evita a rajada de 2× na
+    virada da janela fixa sem guardar um timestamp por request (moving-window),
+    e usa só incr/get — atômicos em qualquer store da `limits`, sem lock nem script.
+    """
+
+    clock: Callable[[], float] = staticmethod(time.time)
+
+    def _windows(self, item: RateLimitItem, identifiers: tuple[str, ...]) -> tuple[str, str, float, float]:
+        period = item.get_expiry()
+        now = self.clock()
+        index = int(now // period)
+        key = item.key_for(*identifiers)
+        previous_weight = 1 - (now - index * period) / period
+        return f"{key}/{index}", f"{key}/{index - 1}", previous_weight, (index + 1) * period
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        current_key, previous_key, weight, _ = self._windows(item, identifiers)
+        previous = self.storage.get(previous_key)
+        if previous * weight >= item.amount:
+            return False
+        current = self.storage.incr(current_key, 2 * item.get_expiry(), amount=cost)
+        if previous * weight + current > item.amount:
+            # Recusada não conta: desfaz o incremento
+            self.storage.incr(current_key, 2 * item.get_expiry(), amount=-cost)
+            return False
+        return True
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        current_key, previous_key, weight, _ = self._windows(item, identifiers)
+        return self.storage.get(previous_key) * weight + self.storage.get(current_key) + cost <= item.amount
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        current_key, previous_key, weight, reset = self._windows(item, identifiers)
+        used = self.storage.get(previous_key) * weight + self.storage.get(current_key)
+        return WindowStats(int(reset), max(0, int(item.amount - used)))
+
+    def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        current_key, previous_key, _, _ = self._windows(item, identifiers)
+        self.storage.clear(current_key)
+        self.storage.clear(previous_key)
+
+
+# slowapi resolve a estratégia pelo nome neste registro da `limits`
+STRATEGIES["sliding-window"] = SlidingWindowRateLimiter
+
+client_ip = ProxyAwareKey(settings.trusted_proxies)
+
+
+def build_limiter(
+    storage_uri: str | None = None,
+    strategy: str | None = None,
+    key_func: Callable[[Request], str] = client_ip,
+) -> Limiter:
+    return Limiter(
+        key_func=key_func,
+        default_limits=["200/minute"],
+        storage_uri=storage_uri or settings.rate_limit_storage_uri,
+        strategy=strategy or settings.rate_limit_strategy,
+        enabled=settings.rate_limit_enabled,
+        # Store compartilhado fora do ar: cada worker passa a limitar localmente em vez de derrubar a API
+        in_memory_fallback_enabled=True,
+    )
+
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["200/minute"])
+limiter = build_limiter()
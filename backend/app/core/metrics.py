@@ -0,0 +1,309 @@
+"""
+Métricas em processo no formato texto do Prometheus (exposto em GET /metrics).
+
+Implementação mínima — contadores, gauges e histogramas com labels — para não
+acrescentar dependência só para isso. Cada observação é um bisect + alguns
+incrementos sob um lock, barato o bastante para ficar ligado em produção.
+
+Como no cache, os valores são por processo: com vários workers cada um expõe
+as próprias séries e o Prometheus soma.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latências HTTP / DB em segundos
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """Gauge com inc/dec/set, ou lido de uma função no momento do scrape (set_function)."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def set_function(self, function: Callable[[], float], *labels: str) -> None:
+        self._functions[labels] = function
+
+    def samples(self) -> Iterable[str]:
+        values = dict(self._values)
+        for labels, function in self._functions.items():
+            values[labels] = function()
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket (não cumulativa) + overflow, soma, total]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def sum(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return series[1] if series else 0.0
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter("http_requests_total", "Requests HTTP atendidos.", ("method", "route", "status"))
+)
+HTTP_LATENCY = registry.register(
+    Histogram("http_request_duration_seconds", "Latência dos requests HTTP por rota.", ("method", "route"))
+)
+HTTP_IN_FLIGHT = registry.register(
+    Gauge("http_requests_in_flight", "Requests HTTP em andamento.", ("method",))
+)
+DB_QUERIES = registry.register(
+    Counter("db_queries_total", "Queries SQL executadas.", ("engine",))
+)
+DB_QUERY_LATENCY = registry.register(
+    Histogram("db_query_duration_seconds", "Duração de cada query SQL.", ("engine",))
+)
+DB_QUERIES_PER_REQUEST = registry.register(
+    Histogram("http_request_db_queries", "Queries SQL por request.", ("route",), buckets=QUERY_COUNT_BUCKETS)
+)
+DB_TIME_PER_REQUEST = registry.register(
+    Histogram("http_request_db_duration_seconds", "Tempo total em queries SQL por request.", ("route",))
+)
+DB_POOL_WAIT = registry.register(
+    Histogram("db_pool_checkout_duration_seconds", "Espera para obter uma conexão do pool.", ("engine",))
+)
+DB_POOL_CHECKED_OUT = registry.register(
+    Gauge("db_pool_checked_out", "Conexões do pool em uso.", ("engine",))
+)
+DB_POOL_SIZE = registry.register(
+    Gauge("db_pool_size", "Tamanho configurado do pool.", ("engine",))
+)
+DB_POOL_OVERFLOW = registry.register(
+    Gauge("db_pool_overflow", "Conexões abertas além de pool_size.", ("engine",))
+)
+
+# Caches (leitura e tokens verificados): lidos de stats() no momento do scrape
+CACHE_STATS = {
+    "hits": registry.register(Gauge("cache_hits", "Hits acumulados do cache.", ("cache", "resource"))),
+    "misses": registry.register(Gauge("cache_misses", "Misses acumulados do cache.", ("cache", "resource"))),
+    "hit_rate": registry.register(
+        Gauge("cache_hit_rate", "Fração das consultas atendidas pelo cache.", ("cache", "resource"))
+    ),
+    "time_saved_seconds": registry.register(
+        Gauge(
+            "cache_time_saved_seconds",
+            "Tempo estimado economizado pelos hits (hits × custo médio de um miss).",
+            ("cache", "resource"),
+        )
+    ),
+    "size": registry.register(Gauge("cache_size", "Entradas guardadas no cache.", ("cache", "resource"))),
+}
+
+
+def instrument_cache(stats: Callable[[], dict[str, float]], cache: str, resource: str) -> None:
+    """Publica hits, misses, hit_rate, time_saved_seconds e size de `stats()` como gauges do /metrics."""
+    for key, gauge in CACHE_STATS.items():
+        gauge.set_function(lambda key=key: stats()[key], cache, resource)
+
+
+@dataclass
+class RequestDBStats:
+    queries: int = 0
+    seconds: float = 0.0
+    # Só preenchido com DB_QUERY_DEBUG (ver app/core/query_debug.py)
+    statements: list[str] | None = field(default=None)
+
+
+# Acumulador do request atual; definido pelo MetricsMiddleware. O SQLAlchemy
+# propaga o contexto para o greenlet das sessões async, então os eventos enxergam o mesmo objeto.
+current_request_db: ContextVar[RequestDBStats | None] = ContextVar("current_request_db", default=None)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Registra eventos de query e de pool numa engine síncrona (para async, use engine.sync_engine)."""
+    if getattr(engine, "_metrics_name", None):
+        return
+    engine._metrics_name = name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        _record_query(conn, name, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        if context.connection is not None:
+            _record_query(context.connection, name, context.statement)
+
+    @event.listens_for(engine, "engine_disposed")
+    def _disposed(engine_):
+        _instrument_pool(engine_, name)
+
+    _instrument_pool(engine, name)
+
+
+def _record_query(conn, name: str, statement: str | None) -> None:
+    started = conn.info.get("_query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    DB_QUERIES.inc(name)
+    DB_QUERY_LATENCY.observe(elapsed, name)
+    stats = current_request_db.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+        if stats.statements is not None and statement is not None:
+            stats.statements.append(statement)
+
+
+def _instrument_pool(engine: Engine, name: str) -> None:
+    """Mede a espera no checkout e expõe o uso do pool (reaplicado quando dispose() recria o pool)."""
+    pool = engine.pool
+    if pool.__dict__.get("_metrics_instrumented"):
+        return
+    pool._metrics_instrumented = True
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started, name)
+
+    pool.connect = timed_connect
+
+    # Pools sem limite (NullPool, StaticPool) não têm size()/overflow()
+    DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else 0, name)
+    DB_POOL_SIZE.set_function(lambda: engine.pool.size() if hasattr(engine.pool, "size") else 0, name)
+    DB_POOL_OVERFLOW.set_function(lambda: max(engine.pool.overflow(), 0) if hasattr(engine.pool, "overflow") else 0, name)
@@ -0,0 +1,45 @@
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: str) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[str, ...]:
+    """Decodifica um cursor opaco gerado por encode_cursor.
+
+    O cliente nunca deve montar o cursor manualmente — qualquer valor
+    malformado vira 400, nunca 500.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
+    return tuple(values)
+
+
+def set_next_cursor(
+    response: Response,
+    items: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], tuple[str, ...]] | None,
+) -> None:
+    """Publica o cursor da próxima página no header X-Next-Cursor.
+
+    Só há próxima página possível quando a página atual veio cheia. key=None:
+    a página não está na ordem do cursor (busca por relevância), sem header.
+    """
+    if key is not None and limit > 0 and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(items[-1]))
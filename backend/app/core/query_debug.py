@@ -0,0 +1,69 @@
+"""
+Contagem de queries por request e detecção de N+1 (modo desenvolvimento/teste).
+
+Com DB_QUERY_DEBUG=true o MetricsMiddleware guarda o SQL de cada statement do
+request, devolve o total no header X-DB-Queries e loga "db.n_plus_one" quando
+o mesmo formato de statement se repete N_PLUS_ONE_THRESHOLD vezes ou mais — o
+sintoma típico de um relacionamento lazy carregado dentro de um loop.
+
+Para testes, assert_max_queries() conta os statements de uma engine dentro de
+um bloco `with` e falha listando o SQL quando o orçamento é estourado.
+"""
+
+import re
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+N_PLUS_ONE_THRESHOLD = 3
+
+_WHITESPACE = re.compile(r"\s+")
+# Listas de placeholders de tamanho variável (IN (?, ?, ?) / IN ($1, $2)) viram um formato só
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+
+
+def normalize_statement(statement: str) -> str:
+    """Formato do statement, ignorando espaços e o tamanho de listas de parâmetros."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?...)", statement)
+
+
+def repeated_statements(statements: list[str], threshold: int = N_PLUS_ONE_THRESHOLD) -> dict[str, int]:
+    """Formatos de statement executados `threshold` vezes ou mais."""
+    counts = Counter(normalize_statement(s) for s in statements)
+    return {shape: n for shape, n in counts.most_common() if n >= threshold}
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+
+@contextmanager
+def record_queries(engine: Engine) -> Iterator[QueryRecorder]:
+    """Registra todos os statements executados pela engine dentro do bloco."""
+    recorder = QueryRecorder()
+    event.listen(engine, "after_cursor_execute", recorder)
+    try:
+        yield recorder
+    finally:
+        event.remove(engine, "after_cursor_execute", recorder)
+
+
+@contextmanager
+def assert_max_queries(engine: Engine, n: int) -> Iterator[QueryRecorder]:
+    with record_queries(engine) as recorder:
+        yield recorder
+    if recorder.count > n:
+        listing = "\n".join(f"  {i}. {normalize_statement(s)}" for i, s in enumerate(recorder.statements, 1))
+        raise AssertionError(f"{recorder.count} queries executadas, orçamento era {n}:\n{listing}")
@@ -0,0 +1,84 @@
+"""
+Serialização rápida para endpoints de listagem.
+
+O caminho padrão do FastAPI para `response_model=list[Schema]` valida cada
+objeto ORM via from_attributes (instancia o model Pydantic) e só depois
+serializa. Em páginas grandes isso domina o tempo de CPU.
+
+RowListSerializer pula as duas etapas intermediárias: a query seleciona só as
+colunas do schema (linhas, não objetos ORM) e um TypeAdapter pré-construído,
+com os mesmos tipos do schema, serializa direto para JSON. Os dados vêm do
+banco, então não há o que validar. A rota mantém o response_model, de modo que
+o OpenAPI não muda.
+"""
+
+import csv
+import io
+import zlib
+from collections.abc import AsyncIterator, Callable, Sequence
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict  # pydantic exige esta versão em Python < 3.12
+
+from app.core.pagination import set_next_cursor
+
+
+class RowListSerializer:
+    def __init__(self, schema: type[BaseModel]):
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+        row_type = TypedDict(
+            f"{schema.__name__}Row",
+            {name: field.annotation for name, field in schema.model_fields.items()},
+        )
+        self._adapter = TypeAdapter(list[row_type])
+        self._row_adapter = TypeAdapter(row_type)
+
+    def columns(self, model: type) -> list[Any]:
+        """Colunas do model na ordem dos campos do schema — passe para select(*columns)."""
+        return [getattr(model, name) for name in self.fields]
+
+    def dump_json(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        fields = self.fields
+        return self._adapter.dump_json([dict(zip(fields, row)) for row in rows])
+
+    def dump_ndjson(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        """Um objeto JSON por linha, cada um terminado em \n."""
+        fields, dump = self.fields, self._row_adapter.dump_json
+        return b"".join(dump(dict(zip(fields, row))) + b"\n" for row in rows)
+
+    def dump_csv(self, rows: Sequence[Sequence[Any]], header: bool = False) -> bytes:
+        """CSV no formato aceito pela importação: célula vazia = None."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if header:
+            writer.writerow(self.fields)
+        writer.writerows(("" if value is None else value for value in row) for row in rows)
+        return buffer.getvalue().encode()
+
+    def response(
+        self,
+        rows: Sequence[Any],
+        limit: int,
+        key: Callable[[Any], tuple[str, ...]] | None,
+    ) -> Response:
+        """Resposta JSON já serializada, com o header X-Next-Cursor quando a página vem cheia."""
+        response = Response(content=self.dump_json(rows), media_type="application/json")
+        set_next_cursor(response, rows, limit, key=key)
+        return response
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    return any(part.split(";")[0].strip() == "gzip" for part in (accept_encoding or "").split(","))
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Comprime um stream em gzip incrementalmente (nunca acumula o corpo inteiro)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: cabeçalho gzip
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
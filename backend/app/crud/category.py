@@ -1,52 +1,121 @@
+from collections.abc import Sequence
+from typing import Any
+
 import structlog
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from app.core.cache import cache
+from app.core.database import insert_if_absent
+from app.crud import dashboard as crud_dashboard
 from app.models.category import Category
+from app.models.product import Product
 from app.schemas.category import CategoryCreate, CategoryUpdate
 import uuid
 
 log = structlog.get_logger("crud.category")
 
 
-def get_category(db: Session, category_id: str) -> Category | None:
-    return db.query(Category).filter(Category.id == category_id).first()
+def _invalidate_cache(category_id: str | None = None) -> None:
+    cache.invalidate_prefix("categories", "list:")
+    if category_id is not None:
+        cache.invalidate("categories", f"item:{category_id}")
+        # Produtos com ?expand=category embutem nome/descrição da categoria
+        cache.invalidate_prefix("products", "expanded:category:")
+    cache.invalidate("dashboard", "data")
+
+
+async def get_category(db: AsyncSession, category_id: str) -> Category | None:
+    return await db.get(Category, category_id)
+
 
+async def get_category_validators(db: AsyncSession, category_id: str) -> Row | None:
+    """Só (version, updated_at): basta para responder um GET condicional."""
+    return (await db.execute(select(Category.version, Category.updated_at).where(Category.id == category_id))).first()
 
-def get_category_by_name(db: Session, name: str) -> Category | None:
-    return db.query(Category).filter(Category.name == name).first()
 
+async def get_category_by_name(db: AsyncSession, name: str) -> Category | None:
+    return await db.scalar(select(Category).where(Category.name == name))
 
-def get_categories(db: Session, skip: int = 0, limit: int = 100) -> list[Category]:
-    return db.query(Category).offset(skip).limit(limit).all()
 
+async def get_categories(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[str, str] | None = None,
+    columns: Sequence[Any] | None = None,
+) -> list[Category]:
+    """Com `columns`, devolve linhas só com essas colunas em vez de objetos ORM."""
+    stmt = (select(*columns) if columns else select(Category)).order_by(Category.name, Category.id)
+    if after is not None:
+        stmt = stmt.where(tuple_(Category.name, Category.id) > after)
+    else:
+        stmt = stmt.offset(skip)
+    if columns:
+        return list((await db.execute(stmt.limit(limit))).all())
+    return list(await db.scalars(stmt.limit(limit)))
 
-def create_category(db: Session, category_in: CategoryCreate) -> Category:
-    db_category = Category(
-        id=str(uuid.uuid4()),
-        **category_in.model_dump()
+
+async def create_category(db: AsyncSession, category_in: CategoryCreate) -> Category | None:
+    """None se já existe categoria com o mesmo nome."""
+    db_category = await insert_if_absent(
+        db, Category, {"id": str(uuid.uuid4()), **category_in.model_dump()}, unique="name"
     )
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    if db_category is None:
+        log.info("category.duplicate", name=category_in.name)
+        return None
+    await crud_dashboard.record_category_created(db, db_category.id)
+    await db.commit()
+    _invalidate_cache()
     log.info("category.created", category_id=db_category.id, name=db_category.name)
     return db_category
 
 
-def update_category(db: Session, db_category: Category, category_in: CategoryUpdate) -> Category:
+async def update_category(db: AsyncSession, db_category: Category, category_in: CategoryUpdate) -> Category | None:
+    """Atualização parcial com checagem de versão; None se a categoria mudou desde a leitura."""
     update_data = category_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_category, field, value)
-    db.commit()
-    db.refresh(db_category)
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        log.warning("category.version_conflict", category_id=db_category.id)
+        return None
+    _invalidate_cache(db_category.id)
     log.info("category.updated", category_id=db_category.id, fields=list(update_data.keys()))
     return db_category
 
 
-def delete_category(db: Session, category_id: str) -> bool:
-    db_category = db.query(Category).filter(Category.id == category_id).first()
-    if not db_category:
+async def delete_category(db: AsyncSession, category_id: str) -> bool:
+    """Remove a categoria; False se ela não existia.
+
+    Primeiro trava a linha da categoria (SELECT ... FOR UPDATE): inexistente,
+    custa esse statement só, sem nada a desfazer. Travada, nenhum produto novo
+    entra nela até o commit (a checagem da FK de um INSERT concorrente espera
+    a trava), então o UPDATE que deixa os produtos sem categoria — como fazia
+    o unit of work do ORM — pega todos, e o DELETE não viola a FK.
+    """
+    locked = await db.scalar(select(Category.id).where(Category.id == category_id).with_for_update())
+    if locked is None:
         log.warning("category.not_found", category_id=category_id)
         return False
-    db.delete(db_category)
-    db.commit()
+    orphaned = list(
+        await db.scalars(
+            update(Product)
+            .where(Product.category_id == category_id)
+            .values(category_id=None)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+    await db.execute(
+        delete(Category).where(Category.id == category_id).execution_options(synchronize_session=False)
+    )
+    await crud_dashboard.record_category_deleted(db, category_id, uncategorized=len(orphaned))
+    await db.commit()
+    _invalidate_cache(category_id)
+    if orphaned:
+        cache.invalidate("products", *(f"item:{product_id}" for product_id in orphaned))
     log.info("category.deleted", category_id=category_id)
     return True
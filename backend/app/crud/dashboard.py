@@ -1,51 +1,241 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, delete, func, insert, select, update
 from decimal import Decimal
 
+from app.core.database import dialect_insert
+from app.models.dashboard import STATS_ROW_ID, CategoryStats, DashboardStats
 from app.models.product import Product
 from app.models.category import Category
 from app.schemas.dashboard import DashboardResponse, CategorySummary, ProductLowStock
 
+log = structlog.get_logger("crud.dashboard")
+
 LOW_STOCK_THRESHOLD = 10
+LOW_STOCK_LIST_LIMIT = 50
 
 
-def get_dashboard_data(db: Session) -> DashboardResponse:
-    total_products: int = db.query(func.count(Product.id)).scalar() or 0
-    total_categories: int = db.query(func.count(Category.id)).scalar() or 0
+class ProductFigures(NamedTuple):
+    """Os campos de um produto que entram nos agregados do dashboard."""
 
-    total_stock_value: Decimal = db.query(
-        func.coalesce(func.sum(Product.price * Product.stock), 0)
-    ).scalar()
+    price: Decimal
+    stock: int
+    category_id: str | None
 
-    low_stock_products = (
-        db.query(Product)
-        .filter(Product.stock < LOW_STOCK_THRESHOLD)
-        .all()
+    @classmethod
+    def of(cls, product: Product) -> "ProductFigures":
+        return cls(Decimal(str(product.price)), product.stock, product.category_id)
+
+
+async def get_dashboard_data(db: AsyncSession) -> DashboardResponse:
+    stats_stmt = select(DashboardStats.__table__).where(DashboardStats.id == STATS_ROW_ID)
+    stats = (await db.execute(stats_stmt)).first()
+    if stats is None:
+        await db.run_sync(rebuild_dashboard_stats)
+        await db.commit()
+        stats = (await db.execute(stats_stmt)).one()
+
+    low_stock_products = await db.scalars(
+        select(Product)
+        .where(Product.stock < LOW_STOCK_THRESHOLD)
+        .order_by(Product.stock, Product.name)
+        .limit(LOW_STOCK_LIST_LIMIT)
     )
 
-    per_category_rows = (
-        db.query(
-            Product.category_id,
-            Category.name.label("category_name"),
-            func.count(Product.id).label("product_count"),
-        )
-        .outerjoin(Category, Product.category_id == Category.id)
-        .group_by(Product.category_id, Category.name)
-        .all()
+    per_category_rows = await db.execute(
+        select(CategoryStats.category_id, CategoryStats.product_count, Category.name.label("category_name"))
+        .outerjoin(Category, CategoryStats.category_id == Category.id)
+        .where(CategoryStats.product_count > 0)
     )
+    products_by_category = [
+        CategorySummary(
+            category_id=row.category_id,
+            category_name=row.category_name or "Sem categoria",
+            product_count=row.product_count,
+        )
+        for row in per_category_rows
+    ]
+    if stats.uncategorized_products > 0:
+        products_by_category.append(
+            CategorySummary(category_id=None, category_name="Sem categoria", product_count=stats.uncategorized_products)
+        )
 
     return DashboardResponse(
-        total_products=total_products,
-        total_categories=total_categories,
-        total_stock_value=Decimal(str(total_stock_value)),
-        low_stock_count=len(low_stock_products),
+        total_products=stats.total_products,
+        total_categories=stats.total_categories,
+        total_stock_value=Decimal(str(stats.total_stock_value)),
+        low_stock_count=stats.low_stock_count,
         low_stock_products=[ProductLowStock.model_validate(p) for p in low_stock_products],
-        products_by_category=[
-            CategorySummary(
-                category_id=row.category_id,
-                category_name=row.category_name or "Sem categoria",
-                product_count=row.product_count,
+        products_by_category=products_by_category,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Manutenção incremental — chamadas pelo CRUD antes do commit, na mesma transação
+# ---------------------------------------------------------------------------
+
+async def record_product_change(
+    db: AsyncSession,
+    before: ProductFigures | None,
+    after: ProductFigures | None,
+) -> None:
+    """Aplica nos agregados a diferença entre o estado anterior e o novo de um produto.
+
+    before=None é uma criação; after=None é uma deleção.
+    """
+    await record_product_changes(
+        db,
+        removed=[before] if before is not None else [],
+        added=[after] if after is not None else [],
+    )
+
+
+async def record_product_changes(
+    db: AsyncSession,
+    removed: Iterable[ProductFigures],
+    added: Iterable[ProductFigures],
+) -> None:
+    """Versão em lote: um único UPDATE nos agregados para qualquer número de produtos."""
+    products = stock_value = low_stock = uncategorized = 0
+    category_deltas: dict[str, int] = {}
+    changes = [(figures, -1) for figures in removed] + [(figures, 1) for figures in added]
+    if not changes:
+        return
+    for figures, sign in changes:
+        products += sign
+        stock_value += sign * figures.price * figures.stock
+        low_stock += sign * (figures.stock < LOW_STOCK_THRESHOLD)
+        if figures.category_id is None:
+            uncategorized += sign
+        else:
+            category_deltas[figures.category_id] = category_deltas.get(figures.category_id, 0) + sign
+    if products == stock_value == low_stock == uncategorized == 0 and not any(category_deltas.values()):
+        # Nada mudou nos agregados (ex.: PATCH só de nome ou descrição): não trava a linha única à toa.
+        return
+
+    result = await db.execute(
+        update(DashboardStats)
+        .where(DashboardStats.id == STATS_ROW_ID)
+        .values(
+            total_products=DashboardStats.total_products + products,
+            total_stock_value=DashboardStats.total_stock_value + stock_value,
+            low_stock_count=DashboardStats.low_stock_count + low_stock,
+            uncategorized_products=DashboardStats.uncategorized_products + uncategorized,
+        )
+    )
+    if result.rowcount == 0:
+        # Agregados ainda não materializados: a primeira leitura reconstrói do zero.
+        return
+
+    rows = [{"category_id": cid, "product_count": delta} for cid, delta in category_deltas.items() if delta]
+    if rows:
+        # Upsert num statement só: "UPDATE e, se não achou, INSERT" deixaria duas transações
+        # inserirem a mesma categoria ao mesmo tempo (IntegrityError na chave primária).
+        stmt = dialect_insert(db)(CategoryStats).values(rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CategoryStats.category_id],
+                set_={"product_count": CategoryStats.product_count + stmt.excluded.product_count},
             )
-            for row in per_category_rows
-        ],
+        )
+
+
+async def record_category_created(db: AsyncSession, category_id: str) -> None:
+    result = await db.execute(
+        update(DashboardStats)
+        .where(DashboardStats.id == STATS_ROW_ID)
+        .values(total_categories=DashboardStats.total_categories + 1)
     )
+    if result.rowcount:
+        await db.execute(insert(CategoryStats).values(category_id=category_id, product_count=0))
+
+
+async def record_category_deleted(db: AsyncSession, category_id: str, uncategorized: int = 0) -> None:
+    """`uncategorized`: produtos da categoria que ficaram com category_id NULL."""
+    await db.execute(
+        update(DashboardStats)
+        .where(DashboardStats.id == STATS_ROW_ID)
+        .values(
+            total_categories=DashboardStats.total_categories - 1,
+            uncategorized_products=DashboardStats.uncategorized_products + uncategorized,
+        )
+    )
+    await db.execute(delete(CategoryStats).where(CategoryStats.category_id == category_id))
+
+
+# ---------------------------------------------------------------------------
+# Reconstrução / verificação de consistência
+#
+# Síncronas de propósito: rodam em scripts (seed.py, rebuild_dashboard.py) com
+# SessionLocal, e no caminho async via AsyncSession.run_sync().
+# ---------------------------------------------------------------------------
+
+def compute_dashboard_stats(db: Session) -> tuple[dict, dict[str, int]]:
+    """Calcula os agregados do zero, varrendo products e categories."""
+    total_products, total_stock_value, low_stock_count, uncategorized = db.query(
+        func.count(Product.id),
+        func.coalesce(func.sum(Product.price * Product.stock), 0),
+        func.coalesce(func.sum(case((Product.stock < LOW_STOCK_THRESHOLD, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Product.category_id.is_(None), 1), else_=0)), 0),
+    ).one()
+    total_categories = db.query(func.count(Category.id)).scalar() or 0
+
+    per_category = dict(
+        db.query(Product.category_id, func.count(Product.id))
+        .filter(Product.category_id.is_not(None))
+        .group_by(Product.category_id)
+        .all()
+    )
+    for (category_id,) in db.query(Category.id).all():
+        per_category.setdefault(category_id, 0)
+
+    stats = {
+        "total_products": total_products,
+        "total_categories": total_categories,
+        "total_stock_value": Decimal(str(total_stock_value)).quantize(Decimal("0.01")),
+        "low_stock_count": low_stock_count,
+        "uncategorized_products": uncategorized,
+    }
+    return stats, per_category
+
+
+def check_dashboard_stats(db: Session) -> list[str]:
+    """Compara os agregados materializados com um cálculo do zero. Retorna as divergências."""
+    expected, expected_per_category = compute_dashboard_stats(db)
+    stored = db.execute(select(DashboardStats.__table__).where(DashboardStats.id == STATS_ROW_ID)).first()
+    if stored is None:
+        return ["dashboard_stats: linha ausente"]
+
+    problems = []
+    for field, value in expected.items():
+        current = getattr(stored, field)
+        if field == "total_stock_value":
+            current = Decimal(str(current)).quantize(Decimal("0.01"))
+        if current != value:
+            problems.append(f"dashboard_stats.{field}: armazenado={current} esperado={value}")
+
+    stored_per_category = dict(db.query(CategoryStats.category_id, CategoryStats.product_count).all())
+    for category_id in sorted(set(expected_per_category) | set(stored_per_category)):
+        current = stored_per_category.get(category_id, 0)
+        value = expected_per_category.get(category_id, 0)
+        if current != value:
+            problems.append(f"dashboard_category_stats[{category_id}]: armazenado={current} esperado={value}")
+    return problems
+
+
+def rebuild_dashboard_stats(db: Session) -> None:
+    """Recalcula e regrava os agregados do zero (sem commit)."""
+    stats, per_category = compute_dashboard_stats(db)
+    db.execute(delete(DashboardStats))
+    db.execute(insert(DashboardStats).values(id=STATS_ROW_ID, **stats))
+    db.execute(delete(CategoryStats))
+    if per_category:
+        db.execute(
+            insert(CategoryStats),
+            [{"category_id": cid, "product_count": count} for cid, count in per_category.items()],
+        )
+    log.info("dashboard.stats_rebuilt", total_products=stats["total_products"], categories=len(per_category))
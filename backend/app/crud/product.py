@@ -1,73 +1,422 @@
+from collections.abc import AsyncIterator, Sequence
+from decimal import Decimal
+from typing import Any
+
 import structlog
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from pydantic import ValidationError
+from sqlalchemy import Row, delete, func, insert, select, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from app.core.cache import cache
+from app.core.ingest import RawRecord
+from app.crud import dashboard as crud_dashboard
+from app.crud.dashboard import ProductFigures
+from app.models.category import Category
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate, ProductStockUpdate
+from app.schemas.product import (
+    ProductBulkDeleteResult,
+    ProductBulkError,
+    ProductBulkResult,
+    ProductCreate,
+    ProductUpdate,
+    ProductStockUpdate,
+    StockAdjustment,
+    StockAdjustmentResult,
+)
 import uuid
 
 log = structlog.get_logger("crud.product")
 
 
-def get_product(db: Session, product_id: str) -> Product | None:
-    return db.query(Product).filter(Product.id == product_id).first()
+def _invalidate_cache(*product_ids: str) -> None:
+    if product_ids:
+        cache.invalidate(
+            "products", *(key for pid in product_ids for key in (f"item:{pid}", f"expanded:category:{pid}"))
+        )
+    cache.invalidate("dashboard", "data")
+
+
+def _trigrams(value: str) -> set[str]:
+    """Mesma extração de trigramas do pg_trgm: cada palavra vira "  palavra "."""
+    grams: set[str] = set()
+    for word in "".join(c if c.isalnum() else " " for c in value.lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Equivalente em Python de similarity() do pg_trgm."""
+    ta, tb = _trigrams(a), _trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+async def get_product(db: AsyncSession, product_id: str, expand_category: bool = False) -> Product | None:
+    options = [joinedload(Product.category)] if expand_category else None
+    return await db.get(Product, product_id, options=options)
+
+
+async def get_product_validators(db: AsyncSession, product_id: str) -> Row | None:
+    """Só (version, updated_at): basta para responder um GET condicional."""
+    return (await db.execute(select(Product.version, Product.updated_at).where(Product.id == product_id))).first()
 
 
-def get_products(
-    db: Session,
+async def get_products(
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     search: str | None = None,
     category_id: str | None = None,
+    after: tuple[str, str] | None = None,
+    expand_category: bool = False,
+    columns: Sequence[Any] | None = None,
+    keyset: bool = False,
 ) -> list[Product]:
-    query = db.query(Product)
+    """Lista produtos ordenados por (name, id).
+
+    Com `keyset` (primeira página) ou `after` (name, id) do último item da
+    página anterior, usa keyset pagination — custo constante por página, via
+    ix_products_name_id. Sem eles, mantém o offset/limit legado.
+
+    Com `search` no modo offset, os resultados vêm por relevância
+    (similaridade de trigramas com o termo buscado). No modo keyset a ordem é
+    sempre (name, id), a mesma do cursor.
+
+    `expand_category` carrega Product.category com selectinload: uma query a
+    mais por página (categories WHERE id IN ...), nunca uma por produto.
+
+    Com `columns`, seleciona só essas colunas e devolve linhas (Row) em vez de
+    objetos ORM — caminho usado pela serialização rápida das listagens.
+    """
+    stmt = _filtered(select(*columns) if columns else select(Product), search, category_id)
+    if expand_category:
+        stmt = stmt.options(selectinload(Product.category))
+    if keyset or after is not None:
+        if after is not None:
+            stmt = stmt.where(tuple_(Product.name, Product.id) > after)
+        stmt = stmt.order_by(Product.name, Product.id).limit(limit)
+        return await _fetch(db, stmt, columns)
     if search:
-        query = query.filter(func.lower(Product.name).contains(search.lower()))
+        return await _ranked_search(db, stmt, search, skip, limit, columns)
+    return await _fetch(db, stmt.order_by(Product.name, Product.id).offset(skip).limit(limit), columns)
+
+
+def _filtered(stmt, search: str | None, category_id: str | None):
+    if search:
+        # lower(name) LIKE '%termo%' é atendido pelo índice GIN ix_products_name_trgm
+        stmt = stmt.where(func.lower(Product.name).contains(search.lower(), autoescape=True))
     if category_id:
-        query = query.filter(Product.category_id == category_id)
-    return query.offset(skip).limit(limit).all()
+        stmt = stmt.where(Product.category_id == category_id)
+    return stmt
 
 
-def get_low_stock_products(db: Session, threshold: int = 10) -> list[Product]:
-    return db.query(Product).filter(Product.stock < threshold).all()
+EXPORT_CHUNK_SIZE = 2000
 
 
-def create_product(db: Session, product_in: ProductCreate) -> Product:
+async def stream_products(
+    db: AsyncSession,
+    columns: Sequence[Any],
+    search: str | None = None,
+    category_id: str | None = None,
+    chunk_size: int | None = None,
+) -> AsyncIterator[Sequence[Any]]:
+    """Percorre todos os produtos filtrados, em lotes de `chunk_size` linhas.
+
+    yield_per + AsyncSession.stream usam cursor do lado do servidor (asyncpg):
+    só um lote fica em memória por vez, qualquer que seja o tamanho da tabela.
+    """
+    stmt = (
+        _filtered(select(*columns), search, category_id)
+        .order_by(Product.name, Product.id)
+        .execution_options(yield_per=chunk_size or EXPORT_CHUNK_SIZE)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def _fetch(db: AsyncSession, stmt, columns: Sequence[Any] | None) -> list:
+    if columns:
+        return list((await db.execute(stmt)).all())
+    return list(await db.scalars(stmt))
+
+
+async def _ranked_search(
+    db: AsyncSession, stmt, search: str, skip: int, limit: int, columns: Sequence[Any] | None = None
+) -> list:
+    if db.get_bind().dialect.name == "postgresql":
+        rank = func.similarity(func.lower(Product.name), search.lower())
+        stmt = stmt.order_by(rank.desc(), Product.name, Product.id).offset(skip).limit(limit)
+        return await _fetch(db, stmt, columns)
+
+    # Fallback (SQLite dos testes): o filtro continua no banco, só o ranking é em Python.
+    matches = await _fetch(db, stmt, columns)
+    matches.sort(key=lambda p: (-trigram_similarity(p.name, search), p.name, p.id))
+    return matches[skip:skip + limit]
+
+
+async def get_low_stock_products(db: AsyncSession, threshold: int = 10) -> list[Product]:
+    return list(await db.scalars(select(Product).where(Product.stock < threshold)))
+
+
+async def create_product(db: AsyncSession, product_in: ProductCreate) -> Product:
     db_product = Product(
         id=str(uuid.uuid4()),
         **product_in.model_dump(),
     )
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await crud_dashboard.record_product_change(db, before=None, after=ProductFigures.of(db_product))
+    await db.commit()
+    _invalidate_cache()
     log.info("product.created", product_id=db_product.id, name=db_product.name, price=str(db_product.price))
     return db_product
 
 
-def update_product(db: Session, db_product: Product, product_in: ProductUpdate) -> Product:
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_REPORTED_ERRORS = 1000
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors())
+
+
+async def bulk_create_products(
+    db: AsyncSession,
+    records: AsyncIterator[RawRecord],
+    chunk_size: int | None = None,
+) -> ProductBulkResult:
+    """Importa produtos em lotes de `chunk_size`, um INSERT multi-linha e um commit por lote.
+
+    Linhas inválidas entram no relatório de erros sem abortar o restante do arquivo.
+    """
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    result = ProductBulkResult()
+
+    def reject(line: int, error: str) -> None:
+        result.failed += 1
+        if len(result.errors) < BULK_MAX_REPORTED_ERRORS:
+            result.errors.append(ProductBulkError(line=line, error=error))
+
+    batch: list[tuple[int, ProductCreate]] = []
+    async for record in records:
+        if record.error is not None:
+            reject(record.line, record.error)
+            continue
+        try:
+            batch.append((record.line, ProductCreate.model_validate(record.data)))
+        except ValidationError as exc:
+            reject(record.line, _format_validation_error(exc))
+            continue
+        if len(batch) >= chunk_size:
+            await _insert_batch(db, batch, result, reject)
+            batch = []
+    if batch:
+        await _insert_batch(db, batch, result, reject)
+
+    # Erros de banco/categoria são detectados no fechamento do lote, depois dos de validação
+    result.errors.sort(key=lambda e: e.line)
+    if result.inserted:
+        _invalidate_cache()
+    log.info("product.bulk_imported", inserted=result.inserted, failed=result.failed)
+    return result
+
+
+async def _insert_batch(db: AsyncSession, batch, result: ProductBulkResult, reject) -> None:
+    category_ids = {p.category_id for _, p in batch if p.category_id}
+    known = set(await db.scalars(select(Category.id).where(Category.id.in_(category_ids)))) if category_ids else set()
+
+    rows = []
+    for line, product_in in batch:
+        if product_in.category_id and product_in.category_id not in known:
+            reject(line, f"category_id: categoria '{product_in.category_id}' não existe")
+            continue
+        rows.append((line, {"id": str(uuid.uuid4()), **product_in.model_dump()}))
+    if not rows:
+        return
+
+    try:
+        await db.execute(insert(Product), [values for _, values in rows])
+        await crud_dashboard.record_product_changes(
+            db,
+            removed=[],
+            added=[ProductFigures(v["price"], v["stock"], v["category_id"]) for _, v in rows],
+        )
+        await db.commit()
+    except SQLAlchemyError as exc:
+        await db.rollback()
+        log.warning("product.bulk_batch_failed", rows=len(rows), error=str(exc.__cause__ or exc))
+        for line, _ in rows:
+            reject(line, "Falha ao gravar o lote no banco.")
+        return
+    result.inserted += len(rows)
+
+
+async def _commit_versioned(db: AsyncSession, product_id: str) -> bool:
+    """Commit de uma escrita versionada. False (com rollback) se outra transação gravou a linha antes."""
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        log.warning("product.version_conflict", product_id=product_id)
+        return False
+    return True
+
+
+async def update_product(db: AsyncSession, db_product: Product, product_in: ProductUpdate) -> Product | None:
+    """Atualização parcial com checagem de versão; None se o produto mudou desde a leitura."""
+    before = ProductFigures.of(db_product)
     update_data = product_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_product, field, value)
-    db.commit()
-    db.refresh(db_product)
+    await crud_dashboard.record_product_change(db, before=before, after=ProductFigures.of(db_product))
+    if not await _commit_versioned(db, db_product.id):
+        return None
+    _invalidate_cache(db_product.id)
     log.info("product.updated", product_id=db_product.id, fields=list(update_data.keys()))
     return db_product
 
 
-def update_stock(db: Session, db_product: Product, stock_in: ProductStockUpdate) -> Product:
+async def update_stock(db: AsyncSession, db_product: Product, stock_in: ProductStockUpdate) -> Product | None:
+    before = ProductFigures.of(db_product)
     old_stock = db_product.stock
     db_product.stock = stock_in.stock
-    db.commit()
-    db.refresh(db_product)
+    await crud_dashboard.record_product_change(db, before=before, after=ProductFigures.of(db_product))
+    if not await _commit_versioned(db, db_product.id):
+        return None
+    _invalidate_cache(db_product.id)
     log.info("product.stock_updated", product_id=db_product.id, old_stock=old_stock, new_stock=db_product.stock)
     return db_product
 
 
-def delete_product(db: Session, product_id: str) -> bool:
-    db_product = db.query(Product).filter(Product.id == product_id).first()
-    if not db_product:
+async def adjust_stock_batch(
+    db: AsyncSession,
+    adjustments: list[StockAdjustment],
+) -> list[StockAdjustmentResult]:
+    """Aplica ajustes de estoque em lote, numa única transação.
+
+    Cada ajuste é um só UPDATE ... RETURNING: `stock = stock + :delta` com a
+    guarda `stock + :delta >= 0` no WHERE. A verificação de negativo e a escrita
+    acontecem no mesmo statement, então ajustes concorrentes não se perdem e
+    nenhum produto fica negativo. Ajustes rejeitados não afetam os demais.
+
+    As linhas são travadas sempre em ordem de id, qualquer que seja a ordem do
+    payload: dois lotes com os mesmos produtos em ordens diferentes ([A, B] e
+    [B, A]) esperam um pelo outro em vez de entrar em deadlock. Os resultados
+    voltam na ordem do payload.
+    """
+    # Ajustes absolutos precisam do estoque anterior (para os agregados do dashboard);
+    # a leitura trava as linhas até o commit, então o valor não muda no meio do lote.
+    # Ela trava todos os produtos do lote, em ordem de id, e não só os absolutos:
+    # travar um absoluto antes de um delta de id menor quebraria a ordem.
+    current: dict[str, int] = {}
+    if any(a.absolute is not None for a in adjustments):
+        rows = await db.execute(
+            select(Product.id, Product.stock)
+            .where(Product.id.in_({a.id for a in adjustments}))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        current = dict(rows.all())
+
+    # sorted é estável: ajustes do mesmo produto mantêm a ordem relativa do payload
+    ordered = sorted(enumerate(adjustments), key=lambda item: item[1].id)
+    results: list[StockAdjustmentResult | None] = [None] * len(adjustments)
+    removed: list[ProductFigures] = []
+    added: list[ProductFigures] = []
+    failed: list[StockAdjustmentResult] = []
+    for position, adjustment in ordered:
+        if adjustment.delta is not None:
+            stmt = (
+                update(Product)
+                .where(Product.id == adjustment.id, Product.stock + adjustment.delta >= 0)
+                .values(stock=Product.stock + adjustment.delta)
+            )
+        else:
+            stmt = update(Product).where(Product.id == adjustment.id).values(stock=adjustment.absolute)
+        row = (
+            await db.execute(
+                stmt.returning(Product.stock, Product.price, Product.category_id),
+                execution_options={"synchronize_session": False},
+            )
+        ).first()
+
+        if row is None:
+            result = StockAdjustmentResult(id=adjustment.id, status="not_found")
+            failed.append(result)
+        else:
+            old_stock = row.stock - adjustment.delta if adjustment.delta is not None else current[adjustment.id]
+            current[adjustment.id] = row.stock
+            price = Decimal(str(row.price))
+            removed.append(ProductFigures(price, old_stock, row.category_id))
+            added.append(ProductFigures(price, row.stock, row.category_id))
+            result = StockAdjustmentResult(id=adjustment.id, status="ok", stock=row.stock)
+        results[position] = result
+
+    if failed:
+        # Nenhuma linha afetada: ou o produto não existe, ou o ajuste deixaria o estoque negativo.
+        existing = set(await db.scalars(select(Product.id).where(Product.id.in_({r.id for r in failed}))))
+        for result in failed:
+            if result.id in existing:
+                result.status = "insufficient_stock"
+
+    await crud_dashboard.record_product_changes(db, removed=removed, added=added)
+    await db.commit()
+
+    applied = {r.id for r in results if r.status == "ok"}
+    if applied:
+        _invalidate_cache(*applied)
+    log.info("product.stock_batch_adjusted", applied=len(added), rejected=len(failed))
+    return results
+
+
+def _delete_returning_figures(ids):
+    """DELETE ... RETURNING dos campos que os agregados do dashboard precisam."""
+    return (
+        delete(Product)
+        .where(Product.id.in_(ids))
+        .returning(Product.id, Product.price, Product.stock, Product.category_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _figures(row: Row) -> ProductFigures:
+    return ProductFigures(Decimal(str(row.price)), row.stock, row.category_id)
+
+
+async def delete_product(db: AsyncSession, product_id: str) -> bool:
+    """Um só DELETE ... RETURNING: sem linha devolvida, o produto não existia."""
+    row = (await db.execute(_delete_returning_figures([product_id]))).first()
+    if row is None:
         log.warning("product.not_found", product_id=product_id)
         return False
-    db.delete(db_product)
-    db.commit()
+    await crud_dashboard.record_product_change(db, before=_figures(row), after=None)
+    await db.commit()
+    _invalidate_cache(product_id)
     log.info("product.deleted", product_id=product_id)
     return True
+
+
+async def delete_products(
+    db: AsyncSession, ids: Sequence[str], chunk_size: int | None = None
+) -> ProductBulkDeleteResult:
+    """Remove vários produtos numa transação: um DELETE ... WHERE id IN (...) RETURNING por lote de `chunk_size`.
+
+    Ids inexistentes (ou repetidos) não são erro — voltam em `not_found`.
+    """
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    wanted = list(dict.fromkeys(ids))
+    rows: list[Row] = []
+    for start in range(0, len(wanted), chunk_size):
+        rows.extend(await db.execute(_delete_returning_figures(wanted[start:start + chunk_size])))
+    await crud_dashboard.record_product_changes(db, removed=[_figures(row) for row in rows], added=[])
+    await db.commit()
+
+    deleted = {row.id for row in rows}
+    if deleted:
+        _invalidate_cache(*deleted)
+    log.info("product.bulk_deleted", deleted=len(deleted), requested=len(wanted))
+    return ProductBulkDeleteResult(deleted=len(deleted), not_found=[i for i in wanted if i not in deleted])
@@ -15,83 +15,141 @@ Com a camada CRUD:
 - Rotas ficam limpas (recebem dados, chamam crud.xxx, devolvem resultado)
 - Queries ficam centralizadas e testáveis isoladamente
 - Reusar a mesma lógica de acesso ao banco em múltiplos lugares
+
+Por que async?
+As rotas rodam no event loop; uma função de CRUD síncrona bloquearia o loop
+(ou ocuparia uma thread do threadpool) durante toda a ida ao banco.
+Com AsyncSession + asyncpg, enquanto uma query espera o PostgreSQL o loop
+atende outras requisições.
 """
 
-from sqlalchemy.orm import Session
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from app.core.database import insert_if_absent
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 import uuid
 
 
-def get_user(db: Session, user_id: str) -> User | None:
+async def get_user(db: AsyncSession, user_id: str) -> User | None:
     """
     Busca um único usuário por ID.
     Retorna None se não existir — quem decide o que fazer com None é a rota.
     """
-    return db.query(User).filter(User.id == user_id).first()
+    return await db.get(User, user_id)
 
 
-def get_user_by_email(db: Session, email: str) -> User | None:
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """
-    Busca por email — útil para checar duplicidade antes de criar.
+    Busca por email. Não use para checar duplicidade antes de criar:
+    create_user já trata o conflito no próprio INSERT.
     """
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == email))
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
+async def get_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after: str | None = None,
+    columns: Sequence[Any] | None = None,
+) -> list[User]:
     """
-    Lista usuários com paginação simples (offset/limit).
-    skip=0, limit=100 são defaults razoáveis para desenvolvimento.
+    Lista usuários ordenados por id.
+
+    Dois modos de paginação:
+    - offset/limit (skip): simples, mas o banco precisa percorrer e descartar
+      `skip` linhas — páginas profundas ficam cada vez mais lentas.
+    - keyset (after): "me dê os próximos `limit` depois do id X".
+      O banco desce direto no índice da PK, custo constante em qualquer página.
 
-    Para produção: considerar keyset pagination (mais eficiente em grandes volumes).
+    Com `columns`, o SELECT traz só essas colunas e o retorno são linhas (Row),
+    não objetos User — sem identity map nem instâncias ORM. É o que a rota de
+    listagem usa: ela só precisa dos campos do UserResponse.
     """
-    return db.query(User).offset(skip).limit(limit).all()
+    stmt = (select(*columns) if columns else select(User)).order_by(User.id)
+    if after is not None:
+        stmt = stmt.where(User.id > after)
+    else:
+        stmt = stmt.offset(skip)
+    if columns:
+        return list((await db.execute(stmt.limit(limit))).all())
+    return list(await db.scalars(stmt.limit(limit)))
 
 
-def create_user(db: Session, user_in: UserCreate) -> User:
+async def create_user(db: AsyncSession, user_in: UserCreate) -> User | None:
     """
-    Cria um novo usuário.
+    Cria um novo usuário. Retorna None se o email já está cadastrado.
 
     Por que usamos model_dump() e não passamos o schema direto?
     Porque o model SQLAlchemy não conhece Pydantic.
     model_dump() converte o schema para dict Python puro.
 
-    O ** desempacota o dict como keyword arguments para o construtor.
+    Por que insert_if_absent e não db.add()?
+    Ele gera um único `INSERT ... ON CONFLICT (email) DO NOTHING RETURNING *`:
+    - a checagem de duplicidade é o próprio índice único, sem janela para
+      dois cadastros simultâneos com o mesmo email;
+    - o RETURNING devolve a linha com os defaults do banco (version,
+      updated_at), então não precisamos de db.refresh() depois do commit.
+    Uma ida ao banco para gravar, em vez de SELECT + INSERT + SELECT.
     """
-    db_user = User(
-        id=str(uuid.uuid4()),  # Geramos o ID aqui — não dependemos do banco
-        **user_in.model_dump()
+    db_user = await insert_if_absent(
+        db,
+        User,
+        {"id": str(uuid.uuid4()), **user_in.model_dump()},  # Geramos o ID aqui — não dependemos do banco
+        unique="email",
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)   # Recarrega o objeto do banco (garante valores defaults do BD)
+    if db_user is None:
+        return None
+    await db.commit()
     return db_user
 
 
-def update_user(db: Session, db_user: User, user_in: UserUpdate) -> User:
+async def update_user(db: AsyncSession, db_user: User, user_in: UserUpdate) -> User | None:
     """
     Atualização parcial (PATCH): só altera os campos enviados.
 
     exclude_unset=True é a chave aqui:
     Se o cliente enviar apenas {"full_name": "João"}, só full_name é atualizado.
     Sem isso, is_active seria sobrescrito com None e corromperia o registro.
+
+    E se dois admins editarem o mesmo usuário ao mesmo tempo?
+    User.version é o version_id_col do mapper: o UPDATE sai com
+    `WHERE id = :id AND version = :versão_lida`. Se outra transação gravou
+    primeiro, nenhuma linha casa e o SQLAlchemy levanta StaleDataError.
+    Devolvemos None e a rota responde 412/409 — a escrita antiga não
+    sobrescreve a nova, e nenhuma linha ficou travada esperando (ao contrário
+    de SELECT ... FOR UPDATE, que enfileiraria todos os escritores).
     """
     update_data = user_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_user, field, value)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        return None
     return db_user
 
 
-def delete_user(db: Session, user_id: str) -> bool:
+async def delete_user(db: AsyncSession, user_id: str) -> bool:
     """
     Deleta um usuário. Retorna True se deletou, False se não encontrou.
-    A rota usa esse bool para decidir se retorna 200 ou 404.
+    A rota usa esse bool para decidir se retorna 204 ou 404.
+
+    Por que não db.get() + db.delete()?
+    Seriam duas idas ao banco (SELECT e DELETE) só para saber se existia.
+    `DELETE ... RETURNING id` responde as duas coisas num statement: se
+    nenhuma linha voltou, o usuário não existia.
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
+    deleted = await db.scalar(
+        delete(User).where(User.id == user_id).returning(User.id).execution_options(synchronize_session=False)
+    )
+    if deleted is None:
         return False
-    db.delete(db_user)
-    db.commit()
+    await db.commit()
     return True
@@ -11,22 +11,32 @@ O que NÃO fica aqui: lógica de negócio, queries, validações.
 Se main.py crescer demais, algo está errado na arquitetura.
 """
 
+import asyncio
+import time
+
 import structlog
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
+from app.core.auth import jwks_manager, token_cache
+from app.core.cache import CACHE_TTLS, cache
+from app.core.config import settings
+from app.core.database import async_engine, engine, warm_pool
 from app.core.limiter import limiter
 from app.core.logging import configure_logging
-from app.middleware.logging_middleware import LoggingMiddleware
+from app.core.metrics import instrument_cache, instrument_engine
+from app.middleware.logging_middleware import REQUEST_ID_HEADER, LoggingMiddleware
+from app.middleware.metrics_middleware import DB_QUERIES_HEADER, MetricsMiddleware
 from app.routes import users
 from app.routes import categories
 from app.routes import products
 from app.routes import dashboard
+from app.routes import metrics
 
 
-configure_logging()
+configure_logging(settings.log_level)
 
 log = structlog.get_logger("app")
 
@@ -39,24 +49,25 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Cada add_middleware envolve os anteriores: LoggingMiddleware fica por fora do
+# CORSMiddleware para logar também as respostas geradas pelo CORS (preflight, 400),
+# e MetricsMiddleware por fora de todos para que a latência medida inclua a pilha inteira.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000", "http://localhost"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", REQUEST_ID_HEADER, DB_QUERIES_HEADER],
 )
 app.add_middleware(LoggingMiddleware)
-# LoggingMiddleware fica por fora do CORSMiddleware para logar também erros CORS.
-# ---------------------------------------------------------------------------
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:3000", "http://localhost"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+instrument_cache(token_cache.stats, "token", "jwt")
+for resource in CACHE_TTLS:
+    instrument_cache(lambda resource=resource: cache.resource_stats(resource), "read", resource)
 
 # ---------------------------------------------------------------------------
 # REGISTRO DE ROUTERS
@@ -65,11 +76,52 @@ app.include_router(users.router)
 app.include_router(categories.router)
 app.include_router(products.router)
 app.include_router(dashboard.router)
+app.include_router(metrics.router)
 
 
 @app.on_event("startup")
 async def on_startup():
-    log.info("app.startup", version="0.1.0", environment="development")
+    log.info(
+        "app.startup",
+        version="0.1.0",
+        environment="development",
+        db_pool_size=settings.db_pool_size,
+        db_max_overflow=settings.db_max_overflow,
+        workers=settings.worker_count,
+    )
+    if settings.warmup:
+        await warm_up()
+    jwks_manager.start()
+
+
+async def warm_up() -> None:
+    """Pool do banco e JWKS prontos antes do primeiro request.
+
+    O uvicorn só começa a aceitar conexões depois do startup, então nenhum request
+    paga o connect ao PostgreSQL nem a busca das chaves no Keycloak. Falha aqui não
+    impede o worker de subir: as rotas tentam de novo sob demanda.
+    """
+    started = time.perf_counter()
+    pool, jwks = await asyncio.gather(
+        asyncio.wait_for(warm_pool(async_engine), settings.warmup_timeout),
+        asyncio.wait_for(jwks_manager.refresh(), settings.warmup_timeout),
+        return_exceptions=True,
+    )
+    for step, result in (("db_pool", pool), ("jwks", jwks)):
+        if isinstance(result, BaseException):
+            log.warning("app.warmup_failed", step=step, error=repr(result))
+    log.info(
+        "app.warmup",
+        db_connections=pool if isinstance(pool, int) else 0,
+        jwks_keys=len(jwks_manager.kids),
+        duration_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await jwks_manager.stop()
+    await async_engine.dispose()
 
 
 @app.get("/", tags=["Health"])
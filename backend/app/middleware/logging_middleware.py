@@ -1,44 +1,89 @@
+import random
+import re
 import time
 import uuid
+from collections.abc import Callable
 
 import structlog
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
 
 log = structlog.get_logger("http")
 
+REQUEST_ID_HEADER = "X-Request-ID"
+# IDs vindos de fora (nginx, outro serviço) só são aceitos se forem curtos e sem caracteres de controle
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Fração dos requests bem-sucedidos (status < 400) que geram log; erros sempre são logados.
+SUCCESS_SAMPLE_RATE = settings.log_success_sample_rate
+
+
+class LoggingMiddleware:
+    """Middleware ASGI puro: um log por request, com request_id e duração.
+
+    A duração vai até o último chunk do corpo da resposta. Ao contrário do
+    BaseHTTPMiddleware, não cria task nem stream intermediário por request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        success_sample_rate: float = SUCCESS_SAMPLE_RATE,
+        sampler: Callable[[], float] = random.random,
+    ):
+        self.app = app
+        self.success_sample_rate = success_sample_rate
+        self._sampler = sampler
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        request_id = str(uuid.uuid4())[:8]
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else str(uuid.uuid4())[:8]
 
         structlog.contextvars.clear_contextvars()
         structlog.contextvars.bind_contextvars(request_id=request_id)
 
         start_time = time.perf_counter()
+        status_code = 500
+        logged = False
 
-        try:
-            response = await call_next(request)
-            duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
-
+        def log_request() -> None:
+            nonlocal logged
+            logged = True
+            if status_code < 400 and self._sampler() >= self.success_sample_rate:
+                return
+            client = scope.get("client")
             log.info(
                 "http.request",
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
-                duration_ms=duration_ms,
-                client_ip=request.client.host if request.client else "unknown",
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration_ms=round((time.perf_counter() - start_time) * 1000, 2),
+                client_ip=client[0] if client else "unknown",
             )
-            return response
 
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not logged:
+                log_request()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as exc:
-            duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
             log.error(
                 "http.error",
-                method=request.method,
-                path=request.url.path,
-                duration_ms=duration_ms,
+                method=scope["method"],
+                path=scope["path"],
+                duration_ms=round((time.perf_counter() - start_time) * 1000, 2),
                 error=str(exc),
                 exc_info=True,
             )
@@ -0,0 +1,76 @@
+import time
+
+import structlog
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    HTTP_IN_FLIGHT,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    RequestDBStats,
+    current_request_db,
+)
+from app.core.query_debug import repeated_statements
+
+log = structlog.get_logger("db")
+
+DB_QUERIES_HEADER = "X-DB-Queries"
+
+# Requests que não casaram com nenhuma rota (404, scanners) ficam num label só,
+# para que paths arbitrários não criem séries novas.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """Template da rota (ex.: /products/{product_id}), preenchido pelo router do FastAPI no scope."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Middleware ASGI puro: latência por rota, requests em andamento e queries SQL por request."""
+
+    def __init__(self, app: ASGIApp, query_debug: bool | None = None):
+        self.app = app
+        # None: segue settings.db_query_debug a cada request (os testes ligam em runtime)
+        self.query_debug = query_debug
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        debug = settings.db_query_debug if self.query_debug is None else self.query_debug
+        db_stats = RequestDBStats(statements=[] if debug else None)
+        token = current_request_db.set(db_stats)
+        HTTP_IN_FLIGHT.inc(method)
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if debug:
+                    MutableHeaders(scope=message)[DB_QUERIES_HEADER] = str(db_stats.queries)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            HTTP_IN_FLIGHT.dec(method)
+            current_request_db.reset(token)
+            route = route_template(scope)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            DB_QUERIES_PER_REQUEST.observe(db_stats.queries, route)
+            DB_TIME_PER_REQUEST.observe(db_stats.seconds, route)
+            if debug:
+                for statement, count in repeated_statements(db_stats.statements).items():
+                    log.warning("db.n_plus_one", method=method, route=route, count=count, statement=statement)
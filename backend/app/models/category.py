@@ -1,11 +1,13 @@
-from sqlalchemy import String
+from sqlalchemy import String, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
+from app.models.mixins import VersionedMixin
 import uuid
 
 
-class Category(Base):
+class Category(VersionedMixin, Base):
     __tablename__ = "categories"
+    __table_args__ = (Index("ix_categories_name_id", "name", "id"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False, index=True)
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+from sqlalchemy import Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+
+STATS_ROW_ID = 1
+
+
+class DashboardStats(Base):
+    """Agregados do dashboard, mantidos incrementalmente pelas escritas do CRUD.
+
+    Tabela de uma única linha (id=1). Pode ser reconstruída do zero com
+    `python rebuild_dashboard.py`.
+    """
+
+    __tablename__ = "dashboard_stats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=STATS_ROW_ID)
+    total_products: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_categories: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_stock_value: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0)
+    low_stock_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    uncategorized_products: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<DashboardStats total_products={self.total_products} total_categories={self.total_categories}>"
+
+
+class CategoryStats(Base):
+    """Contagem de produtos por categoria (apenas produtos com category_id)."""
+
+    __tablename__ = "dashboard_category_stats"
+
+    category_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    product_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<CategoryStats category_id={self.category_id} product_count={self.product_count}>"
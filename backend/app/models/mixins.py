@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import DateTime, Integer, func, literal_column
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class VersionedMixin:
+    """updated_at + version: validadores HTTP (ETag / Last-Modified) e controle de concorrência otimista.
+
+    Os dois são atualizados por qualquer UPDATE na tabela, inclusive os do Core
+    (update(Product).values(...)), via onupdate da coluna. version nunca se repete
+    para a mesma linha, então o ETag derivado dela é forte.
+
+    version também é o version_id_col do mapper: todo UPDATE/DELETE feito pelo ORM
+    sai com `WHERE id = :id AND version = :lida` e, se outra transação gravou antes,
+    nenhuma linha é afetada e o flush levanta StaleDataError — sem travar a linha.
+
+    Nas escritas do ORM os dois valores saem do Python (version_id_col incrementa
+    version, onupdate=utcnow preenche updated_at) e ficam no objeto depois do commit
+    (expire_on_commit=False): as rotas respondem sem db.refresh(). eager_defaults
+    garante o mesmo para colunas que o banco venha a gerar — voltam no RETURNING
+    do próprio INSERT/UPDATE em vez de expirar e exigir outro SELECT.
+    """
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow, server_default=func.now()
+    )
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, onupdate=literal_column("version + 1"), server_default="1"
+    )
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict[str, Any]:
+        return {"version_id_col": cls.version, "eager_defaults": True}
@@ -1,17 +1,30 @@
-from sqlalchemy import String, Integer, Numeric, ForeignKey
+from sqlalchemy import String, Integer, Numeric, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
+from app.models.mixins import VersionedMixin
 import uuid
 
 
-class Product(Base):
+class Product(VersionedMixin, Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Índices de keyset pagination: ORDER BY (name, id), com ou sem filtro de categoria
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_category_id_name_id", "category_id", "name", "id"),
+        # Busca por substring em lower(name) (pg_trgm). Só existe no PostgreSQL;
+        # no SQLite dos testes a busca cai no fallback em Python (crud.product).
+        Index(
+            "ix_products_name_trgm",
+            text("lower(name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     description: Mapped[str | None] = mapped_column(String(1000), nullable=True)
     price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
-    stock: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    stock: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
     category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("categories.id"), nullable=True)
 
     category: Mapped["Category"] = relationship("Category", back_populates="products")  # noqa: F821
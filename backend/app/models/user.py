@@ -1,10 +1,11 @@
 from sqlalchemy import String, Boolean
 from sqlalchemy.orm import Mapped, mapped_column
 from app.core.database import Base
+from app.models.mixins import VersionedMixin
 import uuid
 
 
-class User(Base):
+class User(VersionedMixin, Base):
     __tablename__ = "users"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
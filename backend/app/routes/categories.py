@@ -1,77 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import require_auth
-from app.core.database import get_db
+from app.core.conditional import (
+    Representation,
+    cached_conditional_response,
+    check_if_match,
+    json_representation,
+    version_conflict,
+    version_etag,
+)
+from app.core.database import get_async_db
 from app.core.limiter import limiter
+from app.core.pagination import decode_cursor
+from app.core.serialization import RowListSerializer
 from app.crud import category as crud_category
+from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
+category_rows = RowListSerializer(CategoryResponse)
+
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("30/minute")
-def create_category(
+async def create_category(
     request: Request,
     category_in: CategoryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_auth),
 ):
-    existing = crud_category.get_category_by_name(db, name=category_in.name)
-    if existing:
+    category = await crud_category.create_category(db, category_in=category_in)
+    if category is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Categoria com nome '{category_in.name}' já existe."
         )
-    return crud_category.create_category(db, category_in=category_in)
+    return category
 
 
 @router.get("/", response_model=list[CategoryResponse])
 @limiter.limit("100/minute")
-def list_categories(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud_category.get_categories(db, skip=skip, limit=limit)
+async def list_categories(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    after = decode_cursor(cursor, 2) if cursor else None
+
+    async def load() -> Representation:
+        rows = await crud_category.get_categories(
+            db, skip=skip, limit=limit, after=after, columns=category_rows.columns(Category)
+        )
+        response = category_rows.response(rows, limit, key=lambda c: (c.name, c.id))
+        return json_representation(response.body, headers=response.headers)
+
+    return await cached_conditional_response(request, "categories", f"list:{skip}:{limit}:{cursor or ''}", load)
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 @limiter.limit("100/minute")
-def get_category(request: Request, category_id: str, db: Session = Depends(get_db)):
-    db_category = crud_category.get_category(db, category_id=category_id)
-    if not db_category:
+async def get_category(request: Request, category_id: str, db: AsyncSession = Depends(get_async_db)):
+    async def load() -> Representation | None:
+        found = await crud_category.get_category(db, category_id=category_id)
+        if not found:
+            return None
+        body = CategoryResponse.model_validate(found).model_dump_json().encode()
+        return json_representation(body, etag=version_etag(found.version), last_modified=found.updated_at)
+
+    async def validators():
+        current = await crud_category.get_category_validators(db, category_id=category_id)
+        return (version_etag(current.version), current.updated_at) if current else None
+
+    response = await cached_conditional_response(request, "categories", f"item:{category_id}", load, validators)
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Categoria '{category_id}' não encontrada."
         )
-    return db_category
+    return response
 
 
 @router.patch("/{category_id}", response_model=CategoryResponse)
 @limiter.limit("30/minute")
-def update_category(
+async def update_category(
     request: Request,
+    response: Response,
     category_id: str,
     category_in: CategoryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_auth),
 ):
-    db_category = crud_category.get_category(db, category_id=category_id)
+    db_category = await crud_category.get_category(db, category_id=category_id)
     if not db_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Categoria '{category_id}' não encontrada."
         )
-    return crud_category.update_category(db, db_category=db_category, category_in=category_in)
+    check_if_match(request, version_etag(db_category.version))
+    updated = await crud_category.update_category(db, db_category=db_category, category_in=category_in)
+    if updated is None:
+        raise version_conflict(request)
+    response.headers["ETag"] = version_etag(updated.version)
+    return updated
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 @limiter.limit("30/minute")
-def delete_category(
+async def delete_category(
     request: Request,
     category_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_auth),
 ):
-    deleted = crud_category.delete_category(db, category_id=category_id)
+    deleted = await crud_category.delete_category(db, category_id=category_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
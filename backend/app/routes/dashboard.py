@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.conditional import Representation, cached_conditional_response, json_representation
+from app.core.database import get_async_db
 from app.core.limiter import limiter
 from app.crud import dashboard as crud_dashboard
 from app.schemas.dashboard import DashboardResponse
@@ -11,5 +12,10 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 @router.get("/", response_model=DashboardResponse)
 @limiter.limit("60/minute")
-def get_dashboard(request: Request, db: Session = Depends(get_db)):
-    return crud_dashboard.get_dashboard_data(db)
+async def get_dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load() -> Representation:
+        data = await crud_dashboard.get_dashboard_data(db)
+        # Os agregados mudam a cada escrita de produto: ETag pelo conteúdo, não por linha
+        return json_representation(data.model_dump_json().encode())
+
+    return await cached_conditional_response(request, "dashboard", "data", load)
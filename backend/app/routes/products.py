@@ -1,92 +1,294 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from typing import Literal
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import require_auth
-from app.core.database import get_db
+from app.core.conditional import (
+    Representation,
+    cached_conditional_response,
+    check_if_match,
+    json_representation,
+    version_conflict,
+    version_etag,
+)
+from app.core.database import get_async_db
+from app.core.ingest import SUPPORTED_FORMATS, detect_format, iter_records
 from app.core.limiter import limiter
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.serialization import RowListSerializer, accepts_gzip, gzip_chunks
 from app.crud import product as crud_product
-from app.schemas.product import ProductCreate, ProductUpdate, ProductStockUpdate, ProductResponse
+from app.models.product import Product
+from app.schemas.product import (
+    ProductBulkDeleteResult,
+    ProductBulkResult,
+    ProductCreate,
+    ProductUpdate,
+    ProductStockUpdate,
+    ProductResponse,
+    ProductWithCategoryResponse,
+    StockAdjustment,
+    StockAdjustmentResult,
+)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+product_rows = RowListSerializer(ProductResponse)
+
 
 @router.get("/low-stock", response_model=list[ProductResponse])
 @limiter.limit("60/minute")
-def list_low_stock(request: Request, db: Session = Depends(get_db)):
-    return crud_product.get_low_stock_products(db)
+async def list_low_stock(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await crud_product.get_low_stock_products(db)
 
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("30/minute")
-def create_product(
+async def create_product(
     request: Request,
     product_in: ProductCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_auth),
 ):
-    return crud_product.create_product(db, product_in=product_in)
+    return await crud_product.create_product(db, product_in=product_in)
+
 
+@router.post("/bulk", response_model=ProductBulkResult)
+@limiter.limit("5/minute")
+async def bulk_create_products(
+    request: Request,
+    format: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    _: dict = Depends(require_auth),
+):
+    """Importa produtos em massa a partir de um corpo CSV (com cabeçalho) ou NDJSON.
 
-@router.get("/", response_model=list[ProductResponse])
+    O formato vem de ?format=csv|ndjson ou do Content-Type. O corpo é lido em
+    streaming; linhas inválidas são reportadas sem abortar o arquivo.
+    """
+    fmt = format or detect_format(request.headers.get("content-type"))
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envie text/csv ou application/x-ndjson (ou use ?format=csv|ndjson).",
+        )
+    return await crud_product.bulk_create_products(db, iter_records(request.stream(), fmt))
+
+
+# ProductResponse vem primeiro: sem ?expand a resposta não ganha "category": null
+@router.get("/", response_model=list[ProductResponse | ProductWithCategoryResponse])
 @limiter.limit("100/minute")
-def list_products(
+async def list_products(
     request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    search: str | None = None,
+    category_id: str | None = None,
+    expand: Literal["category"] | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Lista produtos. `?cursor=` (vazio) inicia a paginação por cursor.
+
+    Com `search` sem cursor a página vem por relevância, uma ordem que o cursor
+    (name, id) não sabe continuar: essas páginas não trazem X-Next-Cursor. Para
+    varrer todos os resultados de uma busca, comece com `?search=...&cursor=`.
+    """
+    after = decode_cursor(cursor, 2) if cursor else None
+    keyset = cursor is not None
+    filters = dict(skip=skip, limit=limit, search=search, category_id=category_id, after=after, keyset=keyset)
+    key = (lambda p: (p.name, p.id)) if keyset or not search else None
+    if expand != "category":
+        rows = await crud_product.get_products(db, **filters, columns=product_rows.columns(Product))
+        return product_rows.response(rows, limit, key=key)
+
+    products = await crud_product.get_products(db, **filters, expand_category=True)
+    set_next_cursor(response, products, limit, key=key)
+    return [ProductWithCategoryResponse.model_validate(p) for p in products]
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}},
+)
+@limiter.limit("5/minute")
+async def export_products(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
     search: str | None = None,
     category_id: str | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return crud_product.get_products(db, skip=skip, limit=limit, search=search, category_id=category_id)
+    """Exporta todos os produtos (com os mesmos filtros da listagem) em NDJSON ou CSV.
+
+    A resposta é gerada em streaming a partir de um cursor no servidor: a memória
+    não cresce com o tamanho do catálogo. Com Accept-Encoding: gzip, vem comprimida.
+    O CSV usa as mesmas colunas aceitas por POST /products/bulk.
+    """
+    columns = product_rows.columns(Product)
+
+    async def body():
+        if format == "csv":
+            yield product_rows.dump_csv([], header=True)
+        async for rows in crud_product.stream_products(db, columns, search=search, category_id=category_id):
+            yield product_rows.dump_csv(rows) if format == "csv" else product_rows.dump_ndjson(rows)
 
+    headers = {"Content-Disposition": f'attachment; filename="products.{format}"', "Vary": "Accept-Encoding"}
+    content = body()
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        content = gzip_chunks(content)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
 
-@router.get("/{product_id}", response_model=ProductResponse)
+
+@router.get("/{product_id}", response_model=ProductResponse | ProductWithCategoryResponse)
 @limiter.limit("100/minute")
-def get_product(request: Request, product_id: str, db: Session = Depends(get_db)):
-    db_product = crud_product.get_product(db, product_id=product_id)
-    if not db_product:
+async def get_product(
+    request: Request,
+    product_id: str,
+    expand: Literal["category"] | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    expanded = expand == "category"
+    key = f"expanded:category:{product_id}" if expanded else f"item:{product_id}"
+
+    async def load() -> Representation | None:
+        found = await crud_product.get_product(db, product_id=product_id, expand_category=expanded)
+        if not found:
+            return None
+        if not expanded:
+            body = ProductResponse.model_validate(found).model_dump_json().encode()
+            return json_representation(body, etag=version_etag(found.version), last_modified=found.updated_at)
+        # A resposta embute a categoria: o ETag muda quando qualquer um dos dois muda
+        body = ProductWithCategoryResponse.model_validate(found).model_dump_json().encode()
+        category = found.category
+        if category is None:
+            return json_representation(body, etag=version_etag(found.version, 0), last_modified=found.updated_at)
+        return json_representation(
+            body,
+            etag=version_etag(found.version, category.version),
+            last_modified=max(found.updated_at, category.updated_at),
+        )
+
+    async def validators():
+        current = await crud_product.get_product_validators(db, product_id=product_id)
+        return (version_etag(current.version), current.updated_at) if current else None
+
+    response = await cached_conditional_response(
+        request, "products", key, load, validators=None if expanded else validators
+    )
+    if response is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Produto '{product_id}' não encontrado.")
-    return db_product
+    return response
+
+
+@router.patch("/stock", response_model=list[StockAdjustmentResult])
+@limiter.limit("60/minute")
+async def adjust_stock_batch(
+    request: Request,
+    adjustments: list[StockAdjustment] = Body(..., max_length=10_000),
+    db: AsyncSession = Depends(get_async_db),
+    _: dict = Depends(require_auth),
+):
+    """Ajusta o estoque de vários produtos numa transação: [{id, delta | absolute}].
+
+    Cada item recebe seu próprio status; um item rejeitado (produto inexistente
+    ou estoque que ficaria negativo) não impede os demais.
+    """
+    return await crud_product.adjust_stock_batch(db, adjustments=adjustments)
 
 
 @router.patch("/{product_id}", response_model=ProductResponse)
 @limiter.limit("30/minute")
-def update_product(
+async def update_product(
     request: Request,
+    response: Response,
     product_id: str,
     product_in: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_auth),
 ):
-    db_product = crud_product.get_product(db, product_id=product_id)
+    db_product = await crud_product.get_product(db, product_id=product_id)
     if not db_product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Produto '{product_id}' não encontrado.")
-    return crud_product.update_product(db, db_product=db_product, product_in=product_in)
+    check_if_match(request, version_etag(db_product.version))
+    updated = await crud_product.update_product(db, db_product=db_product, product_in=product_in)
+    if updated is None:
+        raise version_conflict(request)
+    response.headers["ETag"] = version_etag(updated.version)
+    return updated
 
 
 @router.patch("/{product_id}/stock", response_model=ProductResponse)
 @limiter.limit("30/minute")
-def update_stock(
+async def update_stock(
     request: Request,
+    response: Response,
     product_id: str,
     stock_in: ProductStockUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_auth),
 ):
-    db_product = crud_product.get_product(db, product_id=product_id)
+    db_product = await crud_product.get_product(db, product_id=product_id)
     if not db_product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Produto '{product_id}' não encontrado.")
-    return crud_product.update_stock(db, db_product=db_product, stock_in=stock_in)
+    check_if_match(request, version_etag(db_product.version))
+    updated = await crud_product.update_stock(db, db_product=db_product, stock_in=stock_in)
+    if updated is None:
+        raise version_conflict(request)
+    response.headers["ETag"] = version_etag(updated.version)
+    return updated
+
+
+BULK_DELETE_MAX_IDS = 10_000
+
+
+# Sem a barra é o caminho documentado (DELETE /products?ids=...); o redirect 307
+# do Starlette para a versão com barra perderia o corpo em vários clientes.
+@router.delete("", response_model=ProductBulkDeleteResult)
+@router.delete("/", response_model=ProductBulkDeleteResult, include_in_schema=False)
+@limiter.limit("10/minute")
+async def delete_products(
+    request: Request,
+    ids: list[str] = Query([], description="ids separados por vírgula ou repetidos (?ids=a&ids=b)"),
+    body_ids: list[str] | None = Body(None, max_length=BULK_DELETE_MAX_IDS),
+    db: AsyncSession = Depends(get_async_db),
+    _: dict = Depends(require_auth),
+):
+    """Remove vários produtos numa transação: `DELETE /products?ids=a,b,c`.
+
+    Para milhares de ids, mande a lista como corpo JSON (["a", "b", ...]) —
+    a URL tem limite de tamanho nos servidores e proxies. Ids inexistentes
+    voltam em `not_found` e não impedem os demais.
+    """
+    wanted = [i for value in ids for i in value.split(",") if i] + (body_ids or [])
+    if not wanted:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe ao menos um id em ?ids= ou no corpo.",
+        )
+    if len(wanted) > BULK_DELETE_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No máximo {BULK_DELETE_MAX_IDS} ids por chamada.",
+        )
+    return await crud_product.delete_products(db, ids=wanted)
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 @limiter.limit("30/minute")
-def delete_product(
+async def delete_product(
     request: Request,
     product_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_auth),
 ):
-    deleted = crud_product.delete_product(db, product_id=product_id)
+    deleted = await crud_product.delete_product(db, product_id=product_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Produto '{product_id}' não encontrado.")
@@ -17,91 +17,136 @@ Por que response_model=UserResponse?
 - Documenta o contrato da API no Swagger automaticamente
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.conditional import check_if_match, version_conflict, version_etag
+from app.core.database import get_async_db
 from app.core.limiter import limiter
+from app.core.pagination import decode_cursor
+from app.core.serialization import RowListSerializer
 from app.crud import user as crud_user
+from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
 
 # prefix: todas as rotas deste router terão /users como base
 # tags: agrupa no Swagger UI — melhora muito a navegabilidade da doc
 router = APIRouter(prefix="/users", tags=["Users"])
 
+# Serializador pré-construído (uma vez, no import) para a listagem — ver list_users
+user_rows = RowListSerializer(UserResponse)
+
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("20/minute")
-def create_user(request: Request, user_in: UserCreate, db: Session = Depends(get_db)):
+async def create_user(request: Request, user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Cria um novo usuário.
 
-    Por que checamos duplicidade aqui e não no CRUD?
-    Porque é uma REGRA DE NEGÓCIO ("email único"), não uma operação de banco.
-    O CRUD poderia receber a mesma chamada de múltiplos contextos
-    (API, worker, teste) — cada um decide como tratar o conflito.
+    Por que não buscamos o email antes de inserir?
+    "SELECT por email e, se não achou, INSERT" tem uma janela entre as duas
+    queries: dois cadastros simultâneos passam os dois pela checagem e o
+    segundo INSERT estoura o índice único (500). O CRUD tenta o INSERT direto
+    e o banco decide; None significa que o email já existia.
+
+    O 409 continua sendo decidido aqui: "email único" é REGRA DE NEGÓCIO, e
+    outro contexto (worker, teste) pode tratar o None de outro jeito.
     """
-    existing = crud_user.get_user_by_email(db, email=user_in.email)
-    if existing:
+    user = await crud_user.create_user(db, user_in=user_in)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Usuário com email '{user_in.email}' já existe."
         )
-    return crud_user.create_user(db, user_in=user_in)
+    return user
 
 
 @router.get("/", response_model=list[UserResponse])
 @limiter.limit("100/minute")
-def list_users(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def list_users(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Lista usuarios com paginação simples.
+    Lista usuarios com paginação.
     skip e limit viram query params automaticamente: GET /users?skip=0&limit=10
+
+    Para varrer listas grandes, prefira o cursor: quando a página vem cheia,
+    a resposta traz o header X-Next-Cursor; basta repassá-lo em ?cursor=...
+    O corpo continua sendo a mesma lista — clientes antigos não percebem diferença.
     """
-    return crud_user.get_users(db, skip=skip, limit=limit)
+    # Por que devolver um Response pronto em vez da lista?
+    # Retornando objetos, o FastAPI valida cada um contra UserResponse e só
+    # depois serializa. Aqui buscamos só as colunas do schema e serializamos
+    # direto (RowListSerializer). O response_model continua no decorator só
+    # para documentar o contrato no Swagger.
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    rows = await crud_user.get_users(db, skip=skip, limit=limit, after=after, columns=user_rows.columns(User))
+    return user_rows.response(rows, limit, key=lambda u: (u.id,))
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 @limiter.limit("100/minute")
-def get_user(request: Request, user_id: str, db: Session = Depends(get_db)):
+async def get_user(request: Request, response: Response, user_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Busca um usuário pelo ID.
     Retorna 404 se não encontrado — nunca retornamos None na API, sempre HTTP semântico.
+    O header ETag é a versão lida — é ele que o cliente devolve em If-Match no PATCH.
     """
-    db_user = crud_user.get_user(db, user_id=user_id)
+    db_user = await crud_user.get_user(db, user_id=user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuário '{user_id}' não encontrado."
         )
+    response.headers["ETag"] = version_etag(db_user.version)
     return db_user
 
 
 @router.patch("/{user_id}", response_model=UserResponse)
 @limiter.limit("30/minute")
-def update_user(request: Request, user_id: str, user_in: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(
+    request: Request,
+    response: Response,
+    user_id: str,
+    user_in: UserUpdate,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Atualização parcial (PATCH).
     Primeiro busca, depois verifica existência, depois delega para o CRUD.
     Essa sequência — busca → valida → opera — é o padrão correto.
+
+    Envie If-Match com o ETag da última leitura para não sobrescrever a edição
+    de outra pessoa: se o usuário mudou nesse meio-tempo, a resposta é 412.
     """
-    db_user = crud_user.get_user(db, user_id=user_id)
+    db_user = await crud_user.get_user(db, user_id=user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuário '{user_id}' não encontrado."
         )
-    return crud_user.update_user(db, db_user=db_user, user_in=user_in)
+    check_if_match(request, version_etag(db_user.version))
+    updated = await crud_user.update_user(db, db_user=db_user, user_in=user_in)
+    if updated is None:
+        # Outra escrita venceu entre a nossa leitura e o UPDATE
+        raise version_conflict(request)
+    response.headers["ETag"] = version_etag(updated.version)
+    return updated
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 @limiter.limit("20/minute")
-def delete_user(request: Request, user_id: str, db: Session = Depends(get_db)):
+async def delete_user(request: Request, user_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Deleta um usuário.
     204 No Content é o código HTTP correto para DELETE bem-sucedido.
     Não retornamos body — o status code já comunica o resultado.
     """
-    deleted = crud_user.delete_user(db, user_id=user_id)
+    deleted = await crud_user.delete_user(db, user_id=user_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,5 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from decimal import Decimal
+from typing import Literal
+
+from app.schemas.category import CategoryResponse
 
 
 class ProductBase(BaseModel):
@@ -30,3 +33,45 @@ class ProductResponse(ProductBase):
     id: str
 
     model_config = {"from_attributes": True}
+
+
+class ProductWithCategoryResponse(ProductResponse):
+    """Resposta com ?expand=category: a categoria vem embutida (None se o produto não tiver)."""
+
+    category: CategoryResponse | None = None
+
+
+class ProductBulkError(BaseModel):
+    line: int
+    error: str
+
+
+class ProductBulkResult(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: list[ProductBulkError] = []
+
+
+class ProductBulkDeleteResult(BaseModel):
+    deleted: int = 0
+    not_found: list[str] = []
+
+
+class StockAdjustment(BaseModel):
+    """Ajuste de estoque de um produto: relativo (delta) ou absoluto — nunca os dois."""
+
+    id: str
+    delta: int | None = None
+    absolute: int | None = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def _exactly_one_operation(self) -> "StockAdjustment":
+        if (self.delta is None) == (self.absolute is None):
+            raise ValueError("Informe exatamente um entre 'delta' e 'absolute'.")
+        return self
+
+
+class StockAdjustmentResult(BaseModel):
+    id: str
+    status: Literal["ok", "not_found", "insufficient_stock"]
+    stock: int | None = None
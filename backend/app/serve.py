@@ -0,0 +1,122 @@
+"""
+Servidor de produção: `python -m app.serve`.
+
+- Sobe N workers (--workers, WORKERS, ou um por núcleo de CPU quando WORKERS=0)
+  sob o supervisor do uvicorn, que reinicia um worker que morra e repassa os sinais.
+- Recusa subir se workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW) passar de
+  DB_MAX_CONNECTIONS: o PostgreSQL recusaria conexões no pico ("too many clients").
+- Alerta quando há vários workers e o rate limit conta em memória (local://):
+  cada worker aplicaria o limite sozinho, multiplicando as quotas por N.
+- O app é importado no processo pai antes de abrir a porta: erro de configuração
+  ou de import derruba o launcher uma vez, em vez de N workers reiniciando em loop.
+  Os workers são processos novos (spawn) e importam o app de novo — engine, pool e
+  event loop não podem ser herdados de um fork.
+- Cada worker aquece o pool do banco e o JWKS no startup (app.main.warm_up); o
+  uvicorn só aceita conexões depois disso.
+- SIGTERM/SIGINT: o socket para de aceitar conexões, os requests em andamento
+  têm até GRACEFUL_TIMEOUT segundos para terminar e o shutdown fecha o pool.
+- uvloop e httptools são usados quando instalados; sem eles, asyncio e h11.
+
+Desenvolvimento: `python -m app.serve --reload` (um processo, reinicia ao editar).
+"""
+
+import argparse
+import os
+from importlib.util import find_spec
+from typing import Any
+
+import structlog
+import uvicorn
+
+from app.core.config import settings
+
+APP = "app.main:app"
+
+# Stores da `limits` que guardam os contadores no próprio processo
+PER_PROCESS_STORAGES = ("local://", "memory://")
+
+log = structlog.get_logger("app.serve")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Servidor de produção da API.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="padrão: WORKERS, ou um por núcleo de CPU")
+    parser.add_argument("--reload", action="store_true", help="desenvolvimento: um processo, reinicia ao editar")
+    return parser.parse_args(argv)
+
+
+def uvicorn_options(args: argparse.Namespace) -> dict[str, Any]:
+    """Argumentos de uvicorn.run para a linha de comando dada."""
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": 1 if args.reload else args.workers or settings.worker_count,
+        "reload": args.reload,
+        "loop": "auto",  # uvloop se instalado
+        "http": "auto",  # httptools se instalado
+        "timeout_graceful_shutdown": settings.graceful_timeout,
+        # O logging é do app (structlog) e cada request já é logado pelo LoggingMiddleware
+        "log_config": None,
+        "access_log": False,
+    }
+
+
+def check_db_budget() -> None:
+    """SystemExit se os pools de todos os workers somados passam de DB_MAX_CONNECTIONS."""
+    budget = settings.db_max_connections
+    if budget and settings.max_db_connections > budget:
+        log.error("serve.db_budget_exceeded", max_db_connections=settings.max_db_connections, budget=budget)
+        raise SystemExit(
+            f"{settings.worker_count} workers × (DB_POOL_SIZE={settings.db_pool_size} + "
+            f"DB_MAX_OVERFLOW={settings.db_max_overflow}) = {settings.max_db_connections} conexões, acima de "
+            f"DB_MAX_CONNECTIONS={budget}. Reduza WORKERS ou o pool, ou aumente o orçamento junto com o "
+            "max_connections do PostgreSQL."
+        )
+
+
+def rate_limit_per_process(workers: int) -> bool:
+    """True se cada um dos `workers` contaria o rate limit sozinho."""
+    return (
+        workers > 1
+        and settings.rate_limit_enabled
+        and settings.rate_limit_storage_uri.startswith(PER_PROCESS_STORAGES)
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    options = uvicorn_options(parse_args(argv))
+    workers = options["workers"]
+    # Os workers leem as settings do ambiente: que concordem com --workers
+    os.environ["WORKERS"] = str(workers)
+    settings.workers = workers
+    check_db_budget()
+    if rate_limit_per_process(workers):
+        log.warning(
+            "serve.rate_limit_per_process",
+            storage=settings.rate_limit_storage_uri,
+            workers=workers,
+            message=f"cada worker conta o rate limit sozinho: as quotas valem {workers}× o configurado. "
+            "Aponte RATE_LIMIT_STORAGE_URI para um store compartilhado (redis://...).",
+        )
+
+    from app.main import app
+
+    log.info(
+        "serve.start",
+        host=options["host"],
+        port=options["port"],
+        workers=workers,
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11",
+        max_db_connections=settings.max_db_connections,
+        db_max_connections=settings.db_max_connections,
+        graceful_timeout=settings.graceful_timeout,
+    )
+    # Com um worker e sem reload, serve o app já importado, no próprio processo
+    uvicorn.run(APP if workers > 1 or options["reload"] else app, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Preparação comum dos benchmarks: banco descartável, ambiente e app em processo.
+
+Ordem de uso num script:
+
+    url = database_url()          # antes de qualquer import de app.* (settings lidas uma vez)
+    ...                           # popular dados, se preciso
+    app = bench_app()             # app.main com logging reduzido e sem autenticação
+    async with bench_client(app) as client:
+        ...
+"""
+
+import os
+
+BENCH_USER = {"sub": "benchmark"}
+
+
+def database_url(postgres_only: bool = False) -> str:
+    """Lê BENCH_DATABASE_URL e prepara o ambiente do app para apontar para ele.
+
+    Desliga o rate limit (os clientes do benchmark saem todos do mesmo "IP") e o
+    warmup do startup. Precisa rodar antes de importar app.*.
+    """
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url or (postgres_only and not url.startswith("postgresql")):
+        target = "um PostgreSQL" if postgres_only else "um banco"
+        raise SystemExit(f"Defina BENCH_DATABASE_URL apontando para {target} descartável.")
+    os.environ["DATABASE_URL"] = url
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["WARMUP"] = "false"
+    return url
+
+
+def bench_app(log_level: str = "WARNING"):
+    """O app real (app.main), com logging em `log_level` e require_auth liberado."""
+    from app.core.auth import require_auth
+    from app.core.logging import configure_logging
+    from app.main import app  # importar antes de configure_logging: main.py reconfigura o logging
+
+    configure_logging(log_level)
+    app.dependency_overrides[require_auth] = lambda: BENCH_USER
+    return app
+
+
+def use_engine(app, engine) -> None:
+    """Faz as rotas usarem `engine` (AsyncEngine) em vez da engine padrão do app."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.core.database import get_async_db
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def bench_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = bench_db
+
+
+def bench_client(app, **transport_options):
+    """Cliente httpx que chama o app em processo (ASGITransport), sem timeout."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, **transport_options)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark de require_auth: verificação RS256 a cada chamada x cache de tokens validados.
+
+Não precisa de Keycloak nem de banco: gera um par RSA local, instala a chave
+pública no jwks_manager e chama require_auth diretamente, simulando N usuários
+que reusam o próprio access token.
+
+Uso:
+    python -m benchmarks.auth --calls 20000 --tokens 50
+"""
+
+import argparse
+import asyncio
+import time
+
+
+def _setup(tokens: int) -> list[str]:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwk, jwt
+
+    from app.core.auth import jwks_manager
+
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public = jwk.construct(pem, algorithm="RS256").public_key().to_dict()
+    jwks_manager.load([{**public, "kid": "bench", "use": "sig", "alg": "RS256"}])
+
+    exp = int(time.time()) + 3600
+    return [
+        jwt.encode({"sub": f"user-{i}", "exp": exp}, pem, algorithm="RS256", headers={"kid": "bench"})
+        for i in range(tokens)
+    ]
+
+
+async def _run(tokens: list[str], calls: int) -> float:
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from app.core.auth import require_auth
+
+    credentials = [HTTPAuthorizationCredentials(scheme="Bearer", credentials=t) for t in tokens]
+    started = time.perf_counter()
+    for i in range(calls):
+        await require_auth(credentials[i % len(credentials)])
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--tokens", type=int, default=50)
+    args = parser.parse_args()
+
+    from app.core.auth import token_cache
+    from app.core.logging import configure_logging
+
+    configure_logging("WARNING")
+    tokens = _setup(args.tokens)
+
+    print(f"{args.calls} chamadas de require_auth com {args.tokens} tokens distintos\n")
+    print(f"{'modo':<10}{'chamadas/s':>14}{'µs/chamada':>14}")
+    for mode, enabled in (("sem cache", False), ("com cache", True)):
+        token_cache.clear()
+        token_cache.enabled = enabled
+        elapsed = asyncio.run(_run(tokens, args.calls))
+        print(f"{mode:<10}{args.calls / elapsed:>14,.0f}{elapsed / args.calls * 1e6:>14.1f}")
+
+    stats = token_cache.stats()
+    print(f"\nhit rate {stats['hit_rate']:.1%}, verificação média {stats['avg_verify_ms']:.3f} ms, "
+          f"tempo economizado {stats['time_saved_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
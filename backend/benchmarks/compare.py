@@ -0,0 +1,81 @@
+"""
+Compara dois resultados de benchmarks.scenarios e falha se houver regressão.
+
+Por cenário, é regressão: req/s abaixo de (1 - threshold) × baseline, p95 acima
+de (1 + threshold) × baseline, ou mais erros que a baseline. Só faz sentido comparar
+resultados da mesma máquina e do mesmo volume de dados (bloco "meta" do JSON);
+a diferença é avisada, não bloqueia.
+
+Uso:
+    python -m benchmarks.compare benchmarks/baselines/sqlite-10k.json atual.json --threshold 0.15
+"""
+
+import argparse
+import json
+import sys
+
+META_KEYS = ("database", "products", "clients", "requests", "machine")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Regressões de `current` em relação a `baseline`, uma frase por métrica."""
+    regressions = []
+    for scenario, base in baseline["scenarios"].items():
+        now = current["scenarios"].get(scenario)
+        if now is None:
+            continue
+        if now["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{scenario}: req/s {base['rps']:.0f} → {now['rps']:.0f}")
+        if now["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{scenario}: p95 {base['p95_ms']:.1f} ms → {now['p95_ms']:.1f} ms")
+        if now["errors"] > base["errors"]:
+            regressions.append(f"{scenario}: erros {base['errors']} → {now['errors']}")
+    return regressions
+
+
+def _delta(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.1f}%" if before else "—"
+
+
+def print_report(baseline: dict, current: dict, regressions: list[str], threshold: float) -> None:
+    for key in META_KEYS:
+        before, after = baseline.get("meta", {}).get(key), current.get("meta", {}).get(key)
+        if before != after:
+            print(f"aviso: {key} difere da baseline ({before} × {after}); a comparação pode não valer")
+
+    print(f"\n{'cenário':<11}{'req/s base':>12}{'atual':>9}{'Δ':>9}{'p95 base':>11}{'atual':>9}{'Δ':>9}")
+    for scenario, base in baseline["scenarios"].items():
+        now = current["scenarios"].get(scenario)
+        if now is None:
+            continue
+        print(
+            f"{scenario:<11}{base['rps']:>12.0f}{now['rps']:>9.0f}{_delta(base['rps'], now['rps']):>9}"
+            f"{base['p95_ms']:>11.1f}{now['p95_ms']:>9.1f}{_delta(base['p95_ms'], now['p95_ms']):>9}"
+        )
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressão(ões) acima de {threshold:.0%}:")
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+    else:
+        print(f"\n✅ Nenhuma regressão acima de {threshold:.0%}.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="piora tolerada (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print_report(baseline, current, regressions, args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
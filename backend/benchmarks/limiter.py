@@ -0,0 +1,107 @@
+"""
+Benchmark do custo do rate limit por request.
+
+Para cada combinação store × estratégia:
+  hit       — µs por chamada a RateLimiter.hit() (o que o decorator do slowapi faz por request);
+  overhead  — µs a mais por request numa rota mínima com @limiter.limit, chamada
+              direto via ASGI, comparada à mesma rota com o limiter desligado.
+
+`memory://` + `fixed-window` era a configuração anterior (MemoryStorage da
+`limits`, com lock e thread de expiração); `local://` + `sliding-window` é a atual.
+As chaves giram entre --clients IPs, com limite alto o bastante para nunca recusar.
+
+Uso:
+    python -m benchmarks.limiter --requests 50000 --clients 1000
+"""
+
+import argparse
+import asyncio
+import time
+
+# (store, estratégia, key_func); a primeira linha é a configuração anterior
+COMBINATIONS = (
+    ("memory://", "fixed-window", "get_remote_address"),
+    ("memory://", "fixed-window", "client_ip"),
+    ("memory://", "moving-window", "client_ip"),
+    ("local://bench", "fixed-window", "client_ip"),
+    ("local://bench", "sliding-window", "client_ip"),
+)
+
+
+def _bench_hit(storage_uri: str, strategy: str, requests: int, clients: int) -> float:
+    from limits import parse
+    from limits.storage import storage_from_string
+    from limits.strategies import STRATEGIES
+
+    import app.core.limiter  # noqa: F401  (registra local:// e sliding-window)
+
+    limiter = STRATEGIES[strategy](storage_from_string(storage_uri))
+    item = parse("1000000/minute")
+    keys = [f"10.0.{i // 256}.{i % 256}" for i in range(clients)]
+    started = time.perf_counter()
+    for i in range(requests):
+        limiter.hit(item, keys[i % clients])
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def _app(limiter):
+    from fastapi import FastAPI, Request
+
+    app = FastAPI()
+    app.state.limiter = limiter
+
+    @app.get("/ping")
+    @limiter.limit("1000000/minute")
+    async def ping(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+async def _drive(app, requests: int, clients: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scopes = [
+        {
+            "type": "http", "method": "GET", "path": "/ping", "raw_path": b"/ping", "query_string": b"",
+            "headers": [], "client": (f"10.0.{i // 256}.{i % 256}", 1), "server": ("bench", 80),
+            "scheme": "http", "http_version": "1.1", "root_path": "",
+        }
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(dict(scopes[i % clients]), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=1000)
+    args = parser.parse_args()
+
+    from slowapi.util import get_remote_address
+
+    from app.core.limiter import build_limiter, client_ip
+
+    key_funcs = {"get_remote_address": get_remote_address, "client_ip": client_ip}
+    disabled = build_limiter("local://bench-off")
+    disabled.enabled = False
+    baseline = asyncio.run(_drive(_app(disabled), args.requests, args.clients))
+
+    print(f"{args.requests} requests, {args.clients} clientes; rota sem limiter: {baseline:.1f} µs/request\n")
+    print(f"{'store':<16}{'estratégia':<17}{'key_func':<21}{'hit µs':>9}{'overhead µs':>14}")
+    for storage_uri, strategy, key in COMBINATIONS:
+        hit = _bench_hit(storage_uri, strategy, args.requests, args.clients)
+        limiter = build_limiter(storage_uri, strategy, key_func=key_funcs[key])
+        limited = asyncio.run(_drive(_app(limiter), args.requests, args.clients))
+        print(f"{storage_uri:<16}{strategy:<17}{key:<21}{hit:>9.2f}{limited - baseline:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
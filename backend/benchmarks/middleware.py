@@ -0,0 +1,118 @@
+"""
+Benchmark da pilha de middlewares: antes x depois.
+
+  antes  — CORSMiddleware e LoggingMiddleware (BaseHTTPMiddleware) registrados duas vezes,
+           como app/main.py fazia;
+  depois — a pilha atual: um CORSMiddleware e o LoggingMiddleware ASGI puro.
+
+Os dois servem GET / (health check, sem banco) em processo, via httpx.ASGITransport,
+então a diferença medida é só o custo dos middlewares. Os logs vão para um logger
+descartado para que o I/O do terminal não domine a medição.
+
+Uso:
+    python -m benchmarks.middleware --requests 20000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+CORS_OPTIONS = dict(
+    allow_origins=["http://localhost:5173", "http://localhost:3000", "http://localhost"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+
+def _legacy_logging_middleware():
+    import structlog
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    log = structlog.get_logger("http")
+
+    class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            structlog.contextvars.clear_contextvars()
+            structlog.contextvars.bind_contextvars(request_id=str(uuid.uuid4())[:8])
+            start_time = time.perf_counter()
+            response = await call_next(request)
+            log.info(
+                "http.request",
+                method=request.method,
+                path=request.url.path,
+                status_code=response.status_code,
+                duration_ms=round((time.perf_counter() - start_time) * 1000, 2),
+                client_ip=request.client.host if request.client else "unknown",
+            )
+            return response
+
+    return LegacyLoggingMiddleware
+
+
+def _build_app(stack: str):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from app.main import health_check
+    from app.middleware.logging_middleware import LoggingMiddleware
+
+    app = FastAPI()
+    app.get("/")(health_check)
+    if stack == "antes":
+        legacy = _legacy_logging_middleware()
+        for _ in range(2):
+            app.add_middleware(CORSMiddleware, **CORS_OPTIONS)
+            app.add_middleware(legacy)
+    else:
+        app.add_middleware(CORSMiddleware, **CORS_OPTIONS)
+        app.add_middleware(LoggingMiddleware)
+    return app
+
+
+async def _drive(app, total: int, concurrency: int) -> float:
+    import httpx
+
+    remaining = total
+    headers = {"Origin": "http://localhost:5173"}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await client.get("/", headers=headers)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    import importlib
+    import logging
+
+    importlib.import_module("app.main")  # configura o logging ao ser importado
+
+    logging.getLogger().handlers = [logging.NullHandler()]
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print(f"{args.requests} requisições GET / com {args.concurrency} clientes concorrentes\n")
+    print(f"{'pilha':<8}{'req/s':>10}{'µs/req':>10}")
+    for stack in ("antes", "depois"):
+        app = _build_app(stack)
+        asyncio.run(_drive(app, 500, args.concurrency))  # aquecimento
+        elapsed = asyncio.run(_drive(app, args.requests, args.concurrency))
+        print(f"{stack:<8}{args.requests / elapsed:>10,.0f}{elapsed / args.requests * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Cenários de carga da API, servidos em processo (httpx.ASGITransport).
+
+Sem rede nem uvicorn: o número mede o app inteiro — middlewares, rate limit
+desligado, rotas, CRUD, cache e banco — e roda igual em SQLite ou PostgreSQL local.
+
+  list       GET /products/?limit=20, às vezes filtrado por categoria
+  search     GET /products/?search=<termo>&limit=20
+  get        GET /products/{id} entre 1000 produtos
+  dashboard  GET /dashboard/
+  write      PATCH /products/{id} e POST /products/, meio a meio
+  mixed      50% list, 20% get, 15% search, 5% dashboard, 10% write
+
+Os requests de cada cenário são sorteados com semente fixa antes da medição.
+O banco é (re)gerado por benchmarks.data; como `write` acrescenta produtos, o
+próximo run percebe o volume diferente e regera o banco do zero.
+
+Uso:
+    BENCH_DATABASE_URL=sqlite:///./bench.db python -m benchmarks.scenarios --products 10k \\
+        --output benchmarks/baselines/sqlite-10k.json
+    BENCH_DATABASE_URL=sqlite:///./bench.db python -m benchmarks.scenarios --products 10k \\
+        --baseline benchmarks/baselines/sqlite-10k.json        # sai com 1 se houver regressão
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks._app import bench_app, bench_client, database_url
+from benchmarks.data import SIZES, parse_size, populate
+
+Request = tuple[str, str, dict | None]
+
+MIXED = (("list", 50), ("get", 20), ("search", 15), ("dashboard", 5), ("write", 10))
+SCENARIOS = ("list", "search", "get", "dashboard", "write", "mixed")
+# Tipos e marcas do gerador do seed.py, mais um termo sem resultado
+SEARCH_TERMS = ["notebook", "monitor", "ssd", "samsung", "logitech", "wireless", "pro", "xyz-inexistente"]
+
+
+def _request(kind: str, rng: random.Random, product_ids: list[str], category_ids: list[str], seq: int) -> Request:
+    if kind == "list":
+        if category_ids and rng.random() < 0.3:
+            return "GET", f"/products/?limit=20&category_id={rng.choice(category_ids)}", None
+        return "GET", "/products/?limit=20", None
+    if kind == "search":
+        return "GET", f"/products/?limit=20&search={rng.choice(SEARCH_TERMS)}", None
+    if kind == "get":
+        return "GET", f"/products/{rng.choice(product_ids)}", None
+    if kind == "dashboard":
+        return "GET", "/dashboard/", None
+    if rng.random() < 0.5:
+        return "PATCH", f"/products/{rng.choice(product_ids)}", {"stock": rng.randint(0, 500)}
+    body = {"name": f"Produto benchmark {seq}", "price": rng.randint(990, 99_900) / 100, "stock": rng.randint(0, 500)}
+    return "POST", "/products/", body
+
+
+def build_requests(scenario: str, total: int, product_ids: list[str], category_ids: list[str]) -> list[Request]:
+    rng = random.Random(f"{scenario}-{total}")
+    kinds, weights = zip(*MIXED)
+    requests = []
+    for seq in range(total):
+        kind = rng.choices(kinds, weights)[0] if scenario == "mixed" else scenario
+        requests.append(_request(kind, rng, product_ids, category_ids, seq))
+    return requests
+
+
+async def _drive(client, requests: list[Request], clients: int) -> tuple[list[float], int, int, float]:
+    latencies: list[float] = []
+    errors = conflicts = 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors, conflicts
+        for method, path, body in queue:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            # 409: dois PATCH no mesmo produto ao mesmo tempo — resultado esperado, não erro
+            if response.status_code == 409:
+                conflicts += 1
+            elif response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, errors, conflicts, time.perf_counter() - started
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+
+async def run(app, scenarios: list[str], clients: int, total: int, warmup: int) -> dict[str, dict]:
+    from sqlalchemy import select
+
+    from app.core.database import AsyncSessionLocal
+    from app.models.category import Category
+    from app.models.product import Product
+
+    async with AsyncSessionLocal() as db:
+        product_ids = list(await db.scalars(select(Product.id).order_by(Product.id).limit(1000)))
+        category_ids = list(await db.scalars(select(Category.id).order_by(Category.id)))
+
+    results = {}
+    async with bench_client(app) as client:
+        for scenario in scenarios:
+            await _drive(client, build_requests(scenario, warmup, product_ids, category_ids), clients)
+            latencies, errors, conflicts, elapsed = await _drive(
+                client, build_requests(scenario, total, product_ids, category_ids), clients
+            )
+            latencies.sort()
+            results[scenario] = {
+                "rps": round(total / elapsed, 1),
+                "p50_ms": round(statistics.median(latencies), 2),
+                "p95_ms": round(_percentile(latencies, 0.95), 2),
+                "p99_ms": round(_percentile(latencies, 0.99), 2),
+                "errors": errors,
+                "conflicts": conflicts,
+            }
+            r = results[scenario]
+            print(
+                f"{scenario:<11}{r['rps']:>10.0f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                f"{r['p99_ms']:>10.1f}{r['errors']:>8}"
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--products", type=parse_size, default=SIZES["10k"], help="10k, 100k, 1m ou um número")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=1_000, help="requests medidos por cenário")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--output", help="grava o resultado neste JSON (nova baseline)")
+    parser.add_argument("--baseline", help="compara com esta baseline; sai com 1 se houver regressão")
+    parser.add_argument("--threshold", type=float, default=0.15, help="piora tolerada (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    url = database_url()
+    scenarios = args.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+    populate(url, args.products, args.categories)
+    app = bench_app("ERROR")  # cada 409 do cenário write gera um warning product.version_conflict
+
+    from benchmarks.compare import compare, print_report
+
+    print(f"{args.clients} clientes, {args.requests} requests por cenário, {args.products} produtos\n")
+    print(f"{'cenário':<11}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    results = asyncio.run(run(app, scenarios, args.clients, args.requests, args.warmup))
+    current = {
+        "meta": {
+            "database": url.split(":", 1)[0],
+            "products": args.products,
+            "categories": args.categories,
+            "clients": args.clients,
+            "requests": args.requests,
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} núcleos",
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "scenarios": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nresultado gravado em {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        print_report(baseline, current, regressions, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
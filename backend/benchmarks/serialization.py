@@ -0,0 +1,106 @@
+"""
+Benchmark do custo por linha das listagens: caminho padrão x RowListSerializer.
+
+  padrão — SELECT da entidade (objetos ORM) + validação from_attributes em cada
+           item + serialização, como o FastAPI faz com response_model=list[Schema];
+  rápido — SELECT só das colunas do schema (linhas) + TypeAdapter.dump_json.
+
+Roda em SQLite em memória, então mede só CPU (ORM + Pydantic), sem rede nem disco.
+
+Uso:
+    python -m benchmarks.serialization --rows 1000 --repeat 200
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+
+def _seed(session, rows: int) -> None:
+    from app.models.category import Category
+    from app.models.product import Product
+    from app.models.user import User
+
+    rng = random.Random(42)
+    categories = [Category(id=str(uuid.uuid4()), name=f"Categoria {i:05d}", description="Descrição") for i in range(rows)]
+    session.add_all(categories)
+    session.add_all(
+        Product(
+            id=str(uuid.uuid4()),
+            name=f"Produto {i:06d}",
+            description="Produto de benchmark",
+            price=rng.randint(100, 100_000) / 100,
+            stock=rng.randint(0, 200),
+            category_id=rng.choice(categories).id,
+        )
+        for i in range(rows)
+    )
+    session.add_all(
+        User(id=str(uuid.uuid4()), email=f"user{i}@example.com", full_name=f"Usuário {i}", is_active=True)
+        for i in range(rows)
+    )
+    session.commit()
+
+
+def _time(fn, repeat: int) -> float:
+    fn()  # aquecimento
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    from pydantic import TypeAdapter
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import Session
+
+    from app.core.database import Base
+    from app.core.serialization import RowListSerializer
+    from app.models.category import Category
+    from app.models.product import Product
+    from app.models.user import User
+    from app.schemas.category import CategoryResponse
+    from app.schemas.product import ProductResponse
+    from app.schemas.user import UserResponse
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        _seed(session, args.rows)
+
+    print(f"{args.rows} linhas por página, média de {args.repeat} execuções\n")
+    print(f"{'recurso':<12}{'padrão µs/linha':>18}{'rápido µs/linha':>18}{'ganho':>8}")
+    for name, model, schema in (
+        ("products", Product, ProductResponse),
+        ("categories", Category, CategoryResponse),
+        ("users", User, UserResponse),
+    ):
+        adapter = TypeAdapter(list[schema])
+        serializer = RowListSerializer(schema)
+        columns = serializer.columns(model)
+
+        def default_path():
+            with Session(engine) as session:
+                objects = session.scalars(select(model).limit(args.rows)).all()
+                return adapter.dump_json([schema.model_validate(o) for o in objects])
+
+        def fast_path():
+            with Session(engine) as session:
+                rows = session.execute(select(*columns).limit(args.rows)).all()
+                return serializer.dump_json(rows)
+
+        assert default_path() == fast_path()
+        slow = _time(default_path, args.repeat) / args.rows * 1e6
+        fast = _time(fast_path, args.repeat) / args.rows * 1e6
+        print(f"{name:<12}{slow:>18.2f}{fast:>18.2f}{slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Verifica e reconstrói os agregados materializados do dashboard.
+
+    python rebuild_dashboard.py           # recalcula do zero e regrava
+    python rebuild_dashboard.py --check   # só compara; sai com código 1 se houver divergência
+"""
+
+import argparse
+import sys
+
+from app.core.database import SessionLocal
+from app.crud import dashboard as crud_dashboard
+
+
+def run(check_only: bool) -> int:
+    db = SessionLocal()
+    try:
+        problems = crud_dashboard.check_dashboard_stats(db)
+        for problem in problems:
+            print(f"  ✗ {problem}")
+
+        if check_only:
+            if problems:
+                print(f"\n❌ {len(problems)} divergência(s) encontrada(s).")
+                return 1
+            print("✅ Agregados do dashboard consistentes.")
+            return 0
+
+        crud_dashboard.rebuild_dashboard_stats(db)
+        db.commit()
+        print(f"\n✅ Agregados do dashboard reconstruídos ({len(problems)} divergência(s) corrigida(s)).")
+        return 0
+
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Erro ao reconstruir o dashboard: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica/reconstrói dashboard_stats.")
+    parser.add_argument("--check", action="store_true", help="apenas verifica, sem regravar")
+    sys.exit(run(check_only=parser.parse_args().check))
@@ -1,7 +1,37 @@
+"""
+Popula o banco.
+
+    python seed.py                                                  # demonstração: 5 categorias, 20 produtos
+    python seed.py --products 1000000 --categories 50 --users 1000  # volume para testes de capacidade
+
+Os dados gerados saem de um RNG com semente fixa (--seed): a mesma linha de comando
+num banco vazio produz sempre as mesmas linhas. São gravados em lotes — COPY no
+PostgreSQL, INSERT com vários VALUES nos demais bancos — e cada lote é commitado.
+
+Os dois modos são idempotentes: a demonstração só roda em banco vazio, e o modo
+gerado completa cada tabela até a quantidade pedida (rodar de novo não duplica
+nada; rodar com um número maior acrescenta só a diferença). No fim os agregados
+do dashboard são recalculados.
+"""
+
+import argparse
+import csv
+import io
+import random
+import time
 import uuid
-from app.core.database import SessionLocal
+from collections.abc import Iterator
+
+from sqlalchemy import Engine, Table, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, engine
+from app.crud import dashboard as crud_dashboard
 from app.models.category import Category
 from app.models.product import Product
+from app.models.user import User
+
+BATCH_SIZE = 10_000
 
 CATEGORIES = [
     {"name": "Eletrônicos", "description": "Smartphones, tablets, notebooks e acessórios"},
@@ -40,6 +70,132 @@ PRODUCTS = [
 ]
 
 
+DEPARTMENTS = [c["name"] for c in CATEGORIES] + ["Áudio", "Vídeo", "Games", "Casa Inteligente", "Escritório"]
+BRANDS = ["Apple", "Samsung", "Dell", "Lenovo", "Logitech", "Sony", "LG", "Kingston", "TP-Link", "Asus"]
+KINDS = ["Notebook", "Smartphone", "Monitor", "Teclado", "Mouse", "Headset", "SSD", "Roteador", "Webcam", "Tablet"]
+ADJECTIVES = ["Pro", "Ultra", "Max", "Mini", "Air", "Plus", "Lite", "Gamer", "Slim", "Wireless"]
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Felipe", "Gabriela", "Heitor", "Isabela", "João"]
+LAST_NAMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Costa", "Pereira", "Almeida", "Ribeiro", "Gomes"]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _stable_id(kind: str, name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"featcode/{kind}/{name}"))
+
+
+def category_rows(count: int, rng: random.Random, start: int = 0) -> Iterator[dict]:
+    """Categorias `start`..`count`-1; nomes únicos (o departamento ganha um número a partir da 2ª volta)."""
+    for i in range(count):
+        row = {"id": _uuid(rng), "name": DEPARTMENTS[i % len(DEPARTMENTS)]}
+        if i >= len(DEPARTMENTS):
+            row["name"] = f"{row['name']} {i // len(DEPARTMENTS) + 1}"
+        row["description"] = f"Produtos de {row['name'].lower()}"
+        if i >= start:
+            yield row
+
+
+def product_rows(count: int, category_ids: list[str], rng: random.Random, start: int = 0) -> Iterator[dict]:
+    """~5% sem categoria e ~10% com estoque baixo, como no catálogo de demonstração."""
+    for i in range(count):
+        kind, brand, adjective = rng.choice(KINDS), rng.choice(BRANDS), rng.choice(ADJECTIVES)
+        low = crud_dashboard.LOW_STOCK_THRESHOLD
+        row = {
+            "id": _uuid(rng),
+            "name": f"{kind} {brand} {adjective} {rng.randint(1, 9999)}",
+            "description": f"{kind} {brand} linha {adjective}",
+            "price": rng.randint(990, 1_499_900) / 100,
+            "stock": rng.randint(0, low - 1) if rng.random() < 0.10 else rng.randint(low, 500),
+            "category_id": None,
+        }
+        uncategorized = rng.random() < 0.05
+        if category_ids and not uncategorized:
+            row["category_id"] = category_ids[rng.randrange(len(category_ids))]
+        if i >= start:
+            yield row
+
+
+def user_rows(count: int, rng: random.Random, start: int = 0) -> Iterator[dict]:
+    for i in range(count):
+        row = {
+            "id": _uuid(rng),
+            "email": f"usuario{i:07d}@example.com",
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "is_active": rng.random() >= 0.05,
+        }
+        if i >= start:
+            yield row
+
+
+def _copy(conn, table: Table, batch: list[dict]) -> None:
+    """COPY ... FROM STDIN (psycopg2): ordem de grandeza mais rápido que INSERT para milhões de linhas."""
+    columns = list(batch[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    # Campo vazio sem aspas é NULL no COPY em CSV; colunas omitidas (version, updated_at) ficam com o server_default
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def load_rows(engine: Engine, table: Table, rows: Iterator[dict], batch_size: int = BATCH_SIZE) -> int:
+    """Grava `rows` em lotes de `batch_size`, um commit por lote. Retorna quantas linhas gravou."""
+    use_copy = engine.dialect.name == "postgresql" and engine.driver == "psycopg2"
+    inserted = 0
+    while batch := [row for _, row in zip(range(batch_size), rows)]:
+        with engine.begin() as conn:
+            if use_copy:
+                _copy(conn, table, batch)
+            else:
+                conn.execute(insert(table), batch)
+        inserted += len(batch)
+    return inserted
+
+
+def generate(
+    engine: Engine, products: int, categories: int, users: int, seed: int = 42, batch_size: int = BATCH_SIZE
+) -> dict[str, int]:
+    """Completa categories, products e users até as quantidades pedidas. Retorna as linhas gravadas por tabela."""
+    with engine.connect() as conn:
+        existing = {
+            model: conn.execute(select(func.count()).select_from(model)).scalar_one()
+            for model in (Category, Product, User)
+        }
+
+    # Um RNG por tabela: o volume de uma não muda as linhas geradas para as outras
+    written = {}
+    for model, wanted in ((Category, categories), (Product, products), (User, users)):
+        missing = wanted - existing[model]
+        if missing <= 0:
+            written[model.__tablename__] = 0
+            continue
+        rng = random.Random(f"{seed}-{model.__tablename__}")
+        if model is Category:
+            rows = category_rows(wanted, rng, start=existing[model])
+        elif model is Product:
+            with engine.connect() as conn:
+                category_ids = list(conn.scalars(select(Category.id).order_by(Category.id)))
+            rows = product_rows(wanted, category_ids, rng, start=existing[model])
+        else:
+            rows = user_rows(wanted, rng, start=existing[model])
+
+        started = time.perf_counter()
+        count = load_rows(engine, model.__table__, rows, batch_size)
+        elapsed = time.perf_counter() - started
+        written[model.__tablename__] = count
+        print(f"  ✓ {model.__tablename__}: {count:,} linhas em {elapsed:.1f}s ({count / elapsed:,.0f} linhas/s)")
+
+    if any(written.values()):
+        with Session(engine) as db:
+            crud_dashboard.rebuild_dashboard_stats(db)
+            db.commit()
+    return written
+
+
 def run():
     db = SessionLocal()
     try:
@@ -50,26 +206,25 @@ def run():
             print(f"Banco já possui dados ({existing_categories} categorias, {existing_products} produtos). Seed ignorado.")
             return
 
-        category_map: dict[str, str] = {}
-        for cat_data in CATEGORIES:
-            cat = Category(id=str(uuid.uuid4()), **cat_data)
-            db.add(cat)
-            db.flush()
-            category_map[cat.name] = cat.id
-            print(f"  ✓ Categoria: {cat.name}")
-
-        for prod_data in PRODUCTS:
-            cat_name = prod_data.pop("category")
-            prod = Product(
-                id=str(uuid.uuid4()),
-                category_id=category_map.get(cat_name),
-                **prod_data,
-            )
-            db.add(prod)
-            print(f"  ✓ Produto: {prod.name} (estoque: {prod.stock})")
+        # Um INSERT por tabela; ids derivados do nome, iguais em todo banco de desenvolvimento
+        category_map = {cat["name"]: _stable_id("category", cat["name"]) for cat in CATEGORIES}
+        db.execute(insert(Category), [{"id": category_map[cat["name"]], **cat} for cat in CATEGORIES])
+        db.execute(
+            insert(Product),
+            [
+                {
+                    "id": _stable_id("product", prod["name"]),
+                    "category_id": category_map.get(prod["category"]),
+                    **{key: value for key, value in prod.items() if key != "category"},
+                }
+                for prod in PRODUCTS
+            ],
+        )
 
+        # Inserções diretas não passam pelo CRUD — recalcula os agregados do dashboard
+        crud_dashboard.rebuild_dashboard_stats(db)
         db.commit()
-        print(f"\n✅ Seed concluído: {len(CATEGORIES)} categorias, {len(PRODUCTS)} produtos.")
+        print(f"✅ Seed concluído: {len(CATEGORIES)} categorias, {len(PRODUCTS)} produtos.")
 
     except Exception as e:
         db.rollback()
@@ -79,5 +234,28 @@ def run():
         db.close()
 
 
+def run_generated(products: int, categories: int, users: int, seed: int, batch_size: int) -> None:
+    started = time.perf_counter()
+    written = generate(engine, products, categories, users, seed, batch_size)
+    total = sum(written.values())
+    if not total:
+        print("Banco já possui o volume pedido. Seed ignorado.")
+        return
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Seed concluído: {total:,} linhas em {elapsed:.1f}s ({total / elapsed:,.0f} linhas/s).")
+
+
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Popula o banco (sem argumentos: catálogo de demonstração).")
+    parser.add_argument("--products", type=int, help="total de produtos desejado")
+    parser.add_argument("--categories", type=int, help="total de categorias desejado (padrão: 20)")
+    parser.add_argument("--users", type=int, help="total de usuários desejado (padrão: 0)")
+    parser.add_argument("--seed", type=int, default=42, help="semente do gerador")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.products is None and args.categories is None and args.users is None:
+        run()
+    else:
+        categories = 20 if args.categories is None else args.categories
+        run_generated(args.products or 0, categories, args.users or 0, args.seed, args.batch_size)
@@ -1,20 +1,43 @@
+import asyncio
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
-from app.core.database import Base, get_db
+from app.core.auth import require_auth
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import Base, get_async_db
+from app.core.limiter import limiter
+from app.core.metrics import instrument_engine, registry
+from app.core.query_debug import assert_max_queries as _assert_max_queries
 from app.main import app
 
 SQLITE_URL = "sqlite:///./test.db"
+ASYNC_SQLITE_URL = "sqlite+aiosqlite:///./test.db"
 
 engine = create_engine(SQLITE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+# NullPool: cada TestClient roda o app num event loop próprio; conexões aiosqlite
+# não podem ser reaproveitadas entre loops.
+async_engine = create_async_engine(ASYNC_SQLITE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+instrument_engine(async_engine.sync_engine, "async")
+settings.db_query_debug = True
+settings.warmup = False  # o app de teste usa as sessões acima; não há pool nem Keycloak a aquecer
+
 
 @pytest.fixture(scope="function", autouse=True)
 def setup_db():
     Base.metadata.create_all(bind=engine)
+    limiter.reset()
+    cache.clear()
+    registry.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -29,14 +52,35 @@ def db():
 
 
 @pytest.fixture
-def client(db):
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            pass
-
-    app.dependency_overrides[get_db] = override_get_db
+def client():
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[require_auth] = lambda: {"sub": "test-user"}
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def concurrent_requests(client):
+    """Dispara o mesmo request `n` vezes ao mesmo tempo, no mesmo event loop. Devolve os status, ordenados."""
+
+    def run(method: str, url: str, n: int, **kwargs) -> list[int]:
+        async def burst() -> list[int]:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+                responses = await asyncio.gather(*(c.request(method, url, **kwargs) for _ in range(n)))
+            return sorted(r.status_code for r in responses)
+
+        return asyncio.run(burst())
+
+    return run
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Uso: `with assert_max_queries(2): client.get(...)` — falha listando o SQL se passar de 2 queries."""
+    return lambda n: _assert_max_queries(async_engine.sync_engine, n)
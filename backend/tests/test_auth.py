@@ -0,0 +1,229 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from app.core import auth
+from app.core.auth import JWKSManager, VerifiedTokenCache
+
+
+def _make_key(kid):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public = jwk.construct(pem, algorithm="RS256").public_key().to_dict()
+    return pem, {**public, "kid": kid, "use": "sig", "alg": "RS256"}
+
+
+def _token(pem, kid, exp_in=300):
+    claims = {"sub": "user-1"}
+    if exp_in is not None:
+        claims["exp"] = int(time.time()) + exp_in
+    return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeKeycloak:
+    """Servidor HTTP local que serve um JWKS controlado pelo teste."""
+
+    def __init__(self):
+        self.keys = []
+        self.status = 200
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                body = json.dumps({"keys": fake.keys}).encode()
+                self.send_response(fake.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/certs"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def keycloak():
+    server = FakeKeycloak()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def token_cache(monkeypatch):
+    fresh = VerifiedTokenCache()
+    monkeypatch.setattr(auth, "token_cache", fresh)
+    return fresh
+
+
+@pytest.fixture
+def manager(keycloak, clock, monkeypatch):
+    m = JWKSManager(keycloak.url, ttl=300, min_refresh_interval=30, clock=clock)
+    monkeypatch.setattr(auth, "jwks_manager", m)
+    return m
+
+
+def test_verify_token_fetches_jwks_once(keycloak, manager):
+    pem, public = _make_key("k1")
+    keycloak.keys = [public]
+    token = _token(pem, "k1")
+
+    async def scenario():
+        first = await auth.verify_token(token)
+        second = await auth.verify_token(token)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["sub"] == second["sub"] == "user-1"
+    assert keycloak.requests == 1
+
+
+def test_unknown_kids_are_rate_limited(keycloak, manager, clock):
+    pem, public = _make_key("k1")
+    keycloak.keys = [public]
+    asyncio.run(manager.refresh())
+
+    forged_pem, _ = _make_key("forjada")
+
+    async def flood():
+        for i in range(50):
+            with pytest.raises(HTTPException):
+                await auth.verify_token(_token(forged_pem, f"kid-{i}"))
+
+    clock.now += 60
+    asyncio.run(flood())
+    # Só o primeiro kid desconhecido dispara uma busca; os demais caem no intervalo mínimo
+    assert keycloak.requests == 2
+
+
+def test_key_rotation_picks_up_new_kid(keycloak, manager, clock):
+    old_pem, old_public = _make_key("old")
+    keycloak.keys = [old_public]
+    asyncio.run(manager.refresh())
+
+    new_pem, new_public = _make_key("new")
+    keycloak.keys = [new_public]
+    clock.now += 31
+
+    payload = asyncio.run(auth.verify_token(_token(new_pem, "new")))
+    assert payload["sub"] == "user-1"
+    assert manager.kids == {"new"}
+
+
+def test_fetch_failure_keeps_cached_keys(keycloak, manager, clock):
+    pem, public = _make_key("k1")
+    keycloak.keys = [public]
+    asyncio.run(manager.refresh())
+
+    keycloak.status = 500
+    clock.now += 301  # chaves vencidas: renovação em background, que vai falhar
+
+    async def scenario():
+        payload = await auth.verify_token(_token(pem, "k1"))
+        await asyncio.sleep(0.2)
+        await manager.refresh()
+        return payload
+
+    assert asyncio.run(scenario())["sub"] == "user-1"
+    assert manager.kids == {"k1"}
+    assert keycloak.requests == 3
+
+
+def test_concurrent_lookups_share_one_fetch(keycloak, manager):
+    _, public = _make_key("k1")
+    keycloak.keys = [public]
+
+    async def scenario():
+        return await asyncio.gather(*(manager.get_key("k1") for _ in range(20)))
+
+    keys = asyncio.run(scenario())
+    assert all(k is not None for k in keys)
+    assert keycloak.requests == 1
+
+
+def test_invalid_signature_rejected(keycloak, manager):
+    _, public = _make_key("k1")
+    other_pem, _ = _make_key("k1")
+    keycloak.keys = [public]
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.verify_token(_token(other_pem, "k1")))
+    assert exc.value.status_code == 401
+
+
+def test_verified_token_cache_skips_repeated_verification(keycloak, manager, token_cache, monkeypatch):
+    pem, public = _make_key("k1")
+    keycloak.keys = [public]
+    token = _token(pem, "k1")
+
+    decodes = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+
+    async def scenario():
+        return [await auth.verify_token(token) for _ in range(5)]
+
+    payloads = asyncio.run(scenario())
+    assert all(p["sub"] == "user-1" for p in payloads)
+    assert len(decodes) == 1
+
+    stats = token_cache.stats()
+    assert stats["hits"] == 4
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(0.8)
+    assert stats["time_saved_seconds"] > 0
+
+
+def test_verified_token_cache_expires_at_exp(clock):
+    cache = VerifiedTokenCache(clock=clock)
+    cache.put("token", {"sub": "u", "exp": clock.now + 60}, 0.001)
+
+    assert cache.get("token") == {"sub": "u", "exp": clock.now + 60}
+    clock.now += 61
+    assert cache.get("token") is None
+
+
+def test_tokens_without_exp_or_invalid_are_not_cached(keycloak, manager, token_cache):
+    pem, public = _make_key("k1")
+    other_pem, _ = _make_key("k1")
+    keycloak.keys = [public]
+
+    async def scenario():
+        await auth.verify_token(_token(pem, "k1", exp_in=None))
+        with pytest.raises(HTTPException):
+            await auth.verify_token(_token(other_pem, "k1"))
+
+    asyncio.run(scenario())
+    assert token_cache.stats()["size"] == 0
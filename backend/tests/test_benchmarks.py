@@ -0,0 +1,37 @@
+from benchmarks.compare import compare
+from benchmarks.data import parse_size
+
+BASELINE = {
+    "scenarios": {
+        "list": {"rps": 1000.0, "p95_ms": 20.0, "errors": 0},
+        "get": {"rps": 2000.0, "p95_ms": 10.0, "errors": 0},
+    }
+}
+
+
+def _current(**overrides):
+    scenarios = {name: dict(values) for name, values in BASELINE["scenarios"].items()}
+    for key, value in overrides.items():
+        name, metric = key.split("__")
+        scenarios[name][metric] = value
+    return {"scenarios": scenarios}
+
+
+def test_compare_tolerates_noise_within_threshold():
+    assert compare(BASELINE, _current(list__rps=900.0, get__p95_ms=11.0), threshold=0.15) == []
+
+
+def test_compare_flags_regressions():
+    regressions = compare(BASELINE, _current(list__rps=800.0, get__p95_ms=12.0, get__errors=3), threshold=0.15)
+    assert regressions == ["list: req/s 1000 → 800", "get: p95 10.0 ms → 12.0 ms", "get: erros 0 → 3"]
+
+
+def test_compare_ignores_scenarios_not_run():
+    current = {"scenarios": {"list": BASELINE["scenarios"]["list"]}}
+    assert compare(BASELINE, current, threshold=0.15) == []
+
+
+def test_parse_size():
+    assert parse_size("10k") == 10_000
+    assert parse_size("1M") == 1_000_000
+    assert parse_size("2500") == 2_500
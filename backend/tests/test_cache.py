@@ -0,0 +1,90 @@
+from app.core.cache import Cache, InMemoryCacheBackend, cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backend_expires_entries_after_ttl():
+    clock = FakeClock()
+    local = Cache(InMemoryCacheBackend(clock=clock), ttls={"categories": 10})
+    local.get_or_set("categories", "item:1", lambda: "v1")
+
+    clock.now = 9.9
+    assert local.get_or_set("categories", "item:1", lambda: "v2") == "v1"
+    clock.now = 10.0
+    assert local.get_or_set("categories", "item:1", lambda: "v2") == "v2"
+    stats = local.stats()["categories"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 1)
+
+
+def test_backend_evicts_least_recently_used():
+    backend = InMemoryCacheBackend(maxsize=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.get("a")
+    backend.set("c", 3, ttl=60)
+
+    assert len(backend) == 2
+    assert backend.evictions == 1
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+
+
+def test_none_results_are_not_cached():
+    local = Cache(InMemoryCacheBackend(), ttls={})
+    calls = []
+    local.get_or_set("products", "item:x", lambda: calls.append(1))
+    local.get_or_set("products", "item:x", lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_invalidate_prefix_only_touches_matching_keys():
+    local = Cache(InMemoryCacheBackend(), ttls={})
+    for key in ("list:0:100:", "list:0:10:", "item:1"):
+        local.get_or_set("categories", key, lambda: "cached")
+    local.invalidate_prefix("categories", "list:")
+    assert local.get_or_set("categories", "item:1", lambda: "fresh") == "cached"
+    assert local.get_or_set("categories", "list:0:10:", lambda: "fresh") == "fresh"
+
+
+def test_get_category_served_from_cache(client):
+    created = client.post("/categories/", json={"name": "Redes"}).json()
+    client.get(f"/categories/{created['id']}")
+    client.get(f"/categories/{created['id']}")
+    stats = cache.stats()["categories"]
+    assert (stats["hits"], stats["misses"], stats["hit_rate"], stats["size"]) == (1, 1, 0.5, 1)
+    assert stats["time_saved_seconds"] > 0
+
+
+def test_category_update_invalidates_item_list_and_dashboard(client):
+    created = client.post("/categories/", json={"name": "Redes"}).json()
+    client.get(f"/categories/{created['id']}")
+    client.get("/categories/")
+    client.post("/products/", json={"name": "Roteador", "price": 100, "stock": 1, "category_id": created["id"]})
+    client.get("/dashboard/")
+
+    client.patch(f"/categories/{created['id']}", json={"name": "Redes e Wi-Fi"})
+
+    assert client.get(f"/categories/{created['id']}").json()["name"] == "Redes e Wi-Fi"
+    assert client.get("/categories/").json()[0]["name"] == "Redes e Wi-Fi"
+    summary = client.get("/dashboard/").json()["products_by_category"]
+    assert summary[0]["category_name"] == "Redes e Wi-Fi"
+
+
+def test_product_writes_invalidate_product_and_dashboard(client):
+    created = client.post("/products/", json={"name": "Mouse", "price": 50, "stock": 20}).json()
+    client.get(f"/products/{created['id']}")
+    assert client.get("/dashboard/").json()["total_products"] == 1
+
+    client.patch(f"/products/{created['id']}/stock", json={"stock": 3})
+    assert client.get(f"/products/{created['id']}").json()["stock"] == 3
+    assert client.get("/dashboard/").json()["low_stock_count"] == 1
+
+    client.delete(f"/products/{created['id']}")
+    assert client.get(f"/products/{created['id']}").status_code == 404
+    assert client.get("/dashboard/").json()["total_products"] == 0
@@ -1,5 +1,7 @@
 import pytest
 
+from app.crud.dashboard import check_dashboard_stats
+
 
 CATEGORY_PAYLOAD = {"name": "Eletrônicos", "description": "Gadgets e dispositivos"}
 
@@ -18,6 +20,13 @@ def test_create_category_duplicate(client):
     assert response.status_code == 409
 
 
+def test_concurrent_creates_with_same_name(client, db, concurrent_requests):
+    client.get("/dashboard/")
+    assert concurrent_requests("POST", "/categories/", 5, json=CATEGORY_PAYLOAD) == [201, 409, 409, 409, 409]
+    assert len(client.get("/categories/").json()) == 1
+    assert check_dashboard_stats(db) == []
+
+
 def test_list_categories_empty(client):
     response = client.get("/categories/")
     assert response.status_code == 200
@@ -64,3 +73,49 @@ def test_delete_category(client):
 def test_delete_category_not_found(client):
     response = client.delete("/categories/id-inexistente")
     assert response.status_code == 404
+
+
+def test_delete_category_leaves_products_uncategorized(client, db):
+    client.get("/dashboard/")
+    cat = client.post("/categories/", json=CATEGORY_PAYLOAD).json()
+    product_in = {"name": "Teclado", "price": 99.9, "stock": 5, "category_id": cat["id"]}
+    product = client.post("/products/", json=product_in).json()
+
+    assert client.delete(f"/categories/{cat['id']}").status_code == 204
+    assert client.get(f"/products/{product['id']}").json()["category_id"] is None
+    assert check_dashboard_stats(db) == []
+
+
+def test_list_categories_cursor_pagination(client):
+    for name in ["Redes", "Acessórios", "Periféricos"]:
+        client.post("/categories/", json={"name": name})
+
+    first = client.get("/categories/?limit=2")
+    assert [c["name"] for c in first.json()] == ["Acessórios", "Periféricos"]
+
+    second = client.get(f"/categories/?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert [c["name"] for c in second.json()] == ["Redes"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_category_endpoints_query_budget(client, assert_max_queries):
+    client.get("/dashboard/")
+    # INSERT ... RETURNING + agregados do dashboard (UPDATE e INSERT); sem SELECT antes nem refresh depois
+    with assert_max_queries(3):
+        cat = client.post("/categories/", json=CATEGORY_PAYLOAD).json()
+    with assert_max_queries(1):
+        assert client.post("/categories/", json=CATEGORY_PAYLOAD).status_code == 409
+
+    with assert_max_queries(1):
+        client.get("/categories/")
+    with assert_max_queries(1):
+        client.get(f"/categories/{cat['id']}")
+    with assert_max_queries(2):
+        patched = client.patch(f"/categories/{cat['id']}", json={"name": "Outro nome"})
+    assert patched.headers["etag"] == '"2"'
+    # SELECT ... FOR UPDATE + UPDATE dos produtos (ficam sem categoria) + DELETE + agregados
+    with assert_max_queries(5):
+        client.delete(f"/categories/{cat['id']}")
+    # Inexistente: só o SELECT da trava, sem UPDATE nem rollback
+    with assert_max_queries(1):
+        assert client.delete(f"/categories/{cat['id']}").status_code == 404
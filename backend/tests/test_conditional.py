@@ -0,0 +1,187 @@
+from datetime import timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.core.cache import cache
+from app.core.conditional import etag_matches
+from app.core.config import settings
+from app.crud import product as crud_product
+from app.crud.dashboard import check_dashboard_stats
+from app.models.product import Product
+
+PRODUCT = {"name": "Teclado mecânico", "description": None, "price": 399.9, "stock": 20, "category_id": None}
+
+
+def _create_product(client, **overrides):
+    return client.post("/products/", json={**PRODUCT, **overrides}).json()
+
+
+def test_product_has_validators_and_revalidates_with_304(client):
+    product = _create_product(client)
+
+    first = client.get(f"/products/{product['id']}")
+    assert first.status_code == 200
+    assert first.headers["etag"] == '"1"'
+    assert "last-modified" in first.headers
+    assert first.headers["cache-control"] == "no-cache"
+
+    again = client.get(f"/products/{product['id']}", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_etag_changes_after_orm_and_core_updates(client):
+    product = _create_product(client)
+    etag = client.get(f"/products/{product['id']}").headers["etag"]
+
+    client.patch(f"/products/{product['id']}", json={"name": "Teclado 60%"})
+    after_patch = client.get(f"/products/{product['id']}", headers={"If-None-Match": etag})
+    assert after_patch.status_code == 200
+    assert after_patch.json()["name"] == "Teclado 60%"
+    assert after_patch.headers["etag"] == '"2"'
+
+    # Ajuste em lote é um UPDATE do Core: o onupdate da coluna também incrementa version
+    client.patch("/products/stock", json=[{"id": product["id"], "delta": -5}])
+    after_batch = client.get(f"/products/{product['id']}", headers={"If-None-Match": after_patch.headers["etag"]})
+    assert after_batch.status_code == 200
+    assert after_batch.headers["etag"] == '"3"'
+
+
+def test_304_from_cache_skips_database(client, assert_max_queries):
+    product = _create_product(client)
+    etag = client.get(f"/products/{product['id']}").headers["etag"]
+
+    with assert_max_queries(0):
+        assert client.get(f"/products/{product['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_cold_cache_revalidation_reads_only_validators(client, assert_max_queries):
+    product = _create_product(client)
+    etag = client.get(f"/products/{product['id']}").headers["etag"]
+    cache.clear()
+
+    with assert_max_queries(1):
+        assert client.get(f"/products/{product['id']}", headers={"If-None-Match": etag}).status_code == 304
+    assert cache.get("products", f"item:{product['id']}") is None
+
+
+def test_if_modified_since(client, db):
+    product = _create_product(client)
+    updated_at = db.get(Product, product["id"]).updated_at.replace(tzinfo=timezone.utc)
+
+    future = format_datetime(updated_at + timedelta(seconds=1), usegmt=True)
+    past = format_datetime(updated_at - timedelta(seconds=1), usegmt=True)
+    assert client.get(f"/products/{product['id']}", headers={"If-Modified-Since": future}).status_code == 304
+    assert client.get(f"/products/{product['id']}", headers={"If-Modified-Since": past}).status_code == 200
+
+
+def test_expanded_product_etag_follows_category(client):
+    category = client.post("/categories/", json={"name": "Periféricos"}).json()
+    product = _create_product(client, category_id=category["id"])
+    url = f"/products/{product['id']}?expand=category"
+    etag = client.get(url).headers["etag"]
+    assert etag == '"1.1"'
+
+    client.patch(f"/categories/{category['id']}", json={"name": "Acessórios"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["category"]["name"] == "Acessórios"
+    assert response.headers["etag"] == '"1.2"'
+
+
+def test_category_list_304_keeps_cursor_header(client):
+    for name in ("Áudio", "Vídeo"):
+        client.post("/categories/", json={"name": name})
+
+    first = client.get("/categories/?limit=1")
+    assert first.headers["cache-control"] == "public, max-age=60"
+    again = client.get("/categories/?limit=1", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+
+
+def test_category_item_etag(client):
+    category = client.post("/categories/", json={"name": "Monitores"}).json()
+    etag = client.get(f"/categories/{category['id']}").headers["etag"]
+    assert client.get(f"/categories/{category['id']}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/categories/desconhecida", headers={"If-None-Match": etag}).status_code == 404
+
+
+def test_dashboard_etag_changes_with_data(client):
+    etag = client.get("/dashboard/").headers["etag"]
+    assert client.get("/dashboard/", headers={"If-None-Match": etag}).status_code == 304
+
+    _create_product(client)
+    response = client.get("/dashboard/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_cache_control_is_configurable_per_route(client, monkeypatch):
+    monkeypatch.setattr(settings, "cache_control", {"/dashboard/": "private, max-age=5"})
+    assert client.get("/dashboard/").headers["cache-control"] == "private, max-age=5"
+    product = _create_product(client)
+    assert "cache-control" not in client.get(f"/products/{product['id']}").headers
+
+
+def test_etag_matches():
+    assert etag_matches('"1"', '"1"')
+    assert etag_matches('W/"1"', '"1"')
+    assert etag_matches('"0", "1"', '"1"')
+    assert etag_matches("*", '"1"')
+    assert not etag_matches('"2"', '"1"')
+
+
+
+def test_patch_with_if_match(client):
+    product = _create_product(client)
+    etag = client.get(f"/products/{product['id']}").headers["etag"]
+
+    ok = client.patch(f"/products/{product['id']}", json={"stock": 7}, headers={"If-Match": etag})
+    assert ok.status_code == 200
+    assert ok.headers["etag"] == '"2"'
+
+    # Segundo editor ainda com a versão antiga: não sobrescreve
+    stale = client.patch(f"/products/{product['id']}", json={"stock": 99}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert client.get(f"/products/{product['id']}").json()["stock"] == 7
+
+
+def test_if_match_on_category_and_user(client):
+    category = client.post("/categories/", json={"name": "Cabos"}).json()
+    etag = client.get(f"/categories/{category['id']}").headers["etag"]
+    client.patch(f"/categories/{category['id']}", json={"name": "Cabos USB"})
+    assert client.patch(
+        f"/categories/{category['id']}", json={"name": "Cabos HDMI"}, headers={"If-Match": etag}
+    ).status_code == 412
+
+    user = client.post("/users/", json={"full_name": "Ana Lima", "email": "ana@example.com"}).json()
+    etag = client.get(f"/users/{user['id']}").headers["etag"]
+    response = client.patch(f"/users/{user['id']}", json={"full_name": "Ana L."}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"2"'
+
+
+@pytest.mark.parametrize("headers, expected", [({"If-Match": '"1"'}, 412), ({}, 409)])
+def test_write_that_loses_the_race_is_rejected(client, db, monkeypatch, headers, expected):
+    """Outra transação grava entre a leitura e o UPDATE da rota: o UPDATE com WHERE version não casa."""
+    client.get("/dashboard/")  # materializa os agregados, para conferir que o rollback os preserva
+    product = _create_product(client)
+    original_get_product = crud_product.get_product
+
+    async def get_then_concurrent_write(*args, **kwargs):
+        found = await original_get_product(*args, **kwargs)
+        db.execute(update(Product).where(Product.id == product["id"]).values(name="Gravado por outro admin"))
+        db.commit()
+        return found
+
+    monkeypatch.setattr(crud_product, "get_product", get_then_concurrent_write)
+    response = client.patch(f"/products/{product['id']}", json={"name": "Perdido"}, headers=headers)
+
+    assert response.status_code == expected
+    monkeypatch.undo()
+    assert client.get(f"/products/{product['id']}").json()["name"] == "Gravado por outro admin"
+    assert check_dashboard_stats(db) == []
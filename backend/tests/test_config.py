@@ -0,0 +1,51 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+from app.core.database import engine_options
+
+
+def test_settings_read_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "25")
+    monkeypatch.setenv("DB_ECHO", "true")
+    monkeypatch.setenv("WORKERS", "4")
+
+    config = Settings()
+    assert config.db_pool_size == 25
+    assert config.db_echo is True
+    assert config.max_db_connections == 4 * (25 + config.db_max_overflow)
+
+
+def test_invalid_setting_fails_fast(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "0")
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+def test_echo_off_by_default():
+    assert Settings().db_echo is False
+
+
+def test_postgres_engine_options():
+    config = Settings(db_pool_size=7, db_max_overflow=3, db_pool_timeout=5, db_pool_recycle=600, db_statement_timeout_ms=2000)
+
+    sync = engine_options("postgresql://u:p@db/app", config)
+    assert sync["pool_size"] == 7
+    assert sync["max_overflow"] == 3
+    assert sync["pool_timeout"] == 5
+    assert sync["pool_recycle"] == 600
+    assert sync["connect_args"] == {"options": "-c statement_timeout=2000"}
+
+    async_ = engine_options("postgresql+asyncpg://u:p@db/app", config)
+    assert async_["connect_args"] == {"server_settings": {"statement_timeout": "2000"}}
+
+
+def test_statement_timeout_zero_disables_it():
+    options = engine_options("postgresql://u:p@db/app", Settings(db_statement_timeout_ms=0))
+    assert "connect_args" not in options
+
+
+def test_sqlite_keeps_default_pool():
+    options = engine_options("sqlite+aiosqlite:///./test.db", Settings(db_pool_size=50))
+    assert "pool_size" not in options
+    assert "connect_args" not in options
@@ -1,3 +1,5 @@
+from app.core.cache import cache
+
 CATEGORY = {"name": "Eletrônicos", "description": "Gadgets"}
 PRODUCT_BASE = {"name": "Produto Teste", "description": "Desc", "price": 100.0, "stock": 5, "category_id": None}
 
@@ -40,3 +42,88 @@ def test_dashboard_total_categories_independent_of_products(client):
     data = response.json()
     assert data["total_categories"] == 2
     assert data["total_products"] == 0
+
+
+def test_dashboard_stats_follow_writes(client, db):
+    from app.crud.dashboard import check_dashboard_stats
+
+    client.get("/dashboard/")  # materializa os agregados (tabela vazia)
+
+    cat = client.post("/categories/", json=CATEGORY).json()
+    p1 = client.post("/products/", json={**PRODUCT_BASE, "category_id": cat["id"], "price": 10.0, "stock": 20}).json()
+    p2 = client.post("/products/", json={**PRODUCT_BASE, "price": 50.0, "stock": 2}).json()
+    client.patch(f"/products/{p1['id']}/stock", json={"stock": 4})
+    client.patch(f"/products/{p2['id']}", json={"category_id": cat["id"], "price": 30.0})
+    client.delete(f"/products/{p1['id']}")
+    client.post("/categories/", json={"name": "Periféricos"})
+
+    assert check_dashboard_stats(db) == []
+    data = client.get("/dashboard/").json()
+    assert data["total_products"] == 1
+    assert data["total_categories"] == 2
+    assert float(data["total_stock_value"]) == 60.0
+    assert data["low_stock_count"] == 1
+    assert data["products_by_category"] == [
+        {"category_id": cat["id"], "category_name": "Eletrônicos", "product_count": 1}
+    ]
+
+
+def test_dashboard_stats_untouched_when_aggregates_do_not_change(client, db, assert_max_queries):
+    from app.crud.dashboard import check_dashboard_stats
+
+    cat = client.post("/categories/", json=CATEGORY).json()
+    product = client.post("/products/", json={**PRODUCT_BASE, "category_id": cat["id"]}).json()
+    client.get("/dashboard/")  # materializa os agregados
+
+    with assert_max_queries(10) as recorder:
+        client.patch(f"/products/{product['id']}", json={"name": "Outro nome", "description": "Outra descrição"})
+    assert not [s for s in recorder.statements if "dashboard_stats" in s or "category_stats" in s]
+    assert check_dashboard_stats(db) == []
+
+
+def test_category_stats_upsert(client, db, assert_max_queries):
+    from app.crud.dashboard import check_dashboard_stats
+    from app.models.dashboard import CategoryStats
+
+    cat = client.post("/categories/", json=CATEGORY).json()
+    client.get("/dashboard/")
+    db.query(CategoryStats).delete()  # linha ausente: o primeiro produto da categoria a cria
+    db.commit()
+
+    with assert_max_queries(10) as recorder:
+        client.post("/products/", json={**PRODUCT_BASE, "category_id": cat["id"]})
+    client.post("/products/", json={**PRODUCT_BASE, "category_id": cat["id"]})
+
+    upserts = [s for s in recorder.statements if "category_stats" in s]
+    assert len(upserts) == 1 and "ON CONFLICT" in upserts[0]
+    assert check_dashboard_stats(db) == []
+    assert db.get(CategoryStats, cat["id"]).product_count == 2
+
+
+def test_dashboard_stats_rebuild_fixes_drift(client, db):
+    from app.crud.dashboard import check_dashboard_stats, rebuild_dashboard_stats
+    from app.models.dashboard import DashboardStats
+
+    client.post("/products/", json=PRODUCT_BASE)
+    client.get("/dashboard/")
+
+    db.query(DashboardStats).update({DashboardStats.total_products: 99})
+    db.commit()
+    assert check_dashboard_stats(db) == ["dashboard_stats.total_products: armazenado=99 esperado=1"]
+
+    rebuild_dashboard_stats(db)
+    db.commit()
+    assert check_dashboard_stats(db) == []
+    assert client.get("/dashboard/").json()["total_products"] == 1
+
+
+def test_dashboard_query_budget(client, assert_max_queries):
+    cat = client.post("/categories/", json={"name": "Periféricos"}).json()
+    for i in range(5):
+        client.post("/products/", json={"name": f"Mouse {i}", "price": 50, "stock": i, "category_id": cat["id"]})
+    client.get("/dashboard/")
+    cache.clear()
+
+    # Constante: não cresce com o número de produtos ou categorias
+    with assert_max_queries(3):
+        client.get("/dashboard/")
@@ -0,0 +1,104 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from limits import parse
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from starlette.datastructures import Headers
+
+from app.core.limiter import LocalStorage, ProxyAwareKey, SlidingWindowRateLimiter, build_limiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRequest:
+    def __init__(self, host: str, forwarded: str | None = None):
+        self.client = type("Client", (), {"host": host})()
+        self.headers = Headers({"x-forwarded-for": forwarded} if forwarded else {})
+
+
+def _sliding(limit: str = "10/minute", name: str = "sliding-test"):
+    clock = FakeClock(6000.0)  # início exato de uma janela de 60s
+    storage = LocalStorage(f"local://{name}")
+    storage.reset()
+    storage.clock = clock
+    strategy = SlidingWindowRateLimiter(storage)
+    strategy.clock = clock
+    return strategy, parse(limit), clock
+
+
+def test_proxy_aware_key_only_trusts_configured_proxies():
+    key = ProxyAwareKey(["10.0.0.0/8"])
+
+    assert key(FakeRequest("203.0.113.9")) == "203.0.113.9"
+    # Cliente direto forjando o header: ignorado
+    assert key(FakeRequest("203.0.113.9", forwarded="1.2.3.4")) == "203.0.113.9"
+    # Via nginx (10.0.0.5): o último endereço não confiável é o cliente
+    assert key(FakeRequest("10.0.0.5", forwarded="198.51.100.7")) == "198.51.100.7"
+    # Cliente forjou a parte da esquerda; a direita foi escrita pelo proxy
+    assert key(FakeRequest("10.0.0.5", forwarded="1.2.3.4, 198.51.100.7, 10.0.0.9")) == "198.51.100.7"
+    assert key(FakeRequest("10.0.0.5", forwarded="lixo, 10.0.0.9")) == "10.0.0.9"
+
+
+def test_sliding_window_limits_and_does_not_count_rejections():
+    strategy, item, clock = _sliding()
+
+    assert all(strategy.hit(item, "client") for _ in range(10))
+    assert not strategy.hit(item, "client")
+    assert not strategy.hit(item, "client")
+    assert strategy.hit(item, "other-client")
+
+    # Metade da janela seguinte: a anterior pesa 0.5 → 5 das 10 hits ainda contam
+    clock.now += 90
+    assert strategy.get_window_stats(item, "client").remaining == 5
+    assert sum(strategy.hit(item, "client") for _ in range(10)) == 5
+
+
+def test_sliding_window_has_no_burst_at_window_boundary():
+    strategy, item, clock = _sliding()
+    clock.now += 59
+    assert all(strategy.hit(item, "client") for _ in range(10))
+
+    # Janela fixa liberaria mais 10 no segundo seguinte; aqui a anterior ainda pesa ~98%
+    clock.now += 1
+    assert not strategy.hit(item, "client")
+
+
+def _worker_app(limiter) -> FastAPI:
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/ping")
+    @limiter.limit("3/minute")
+    async def ping(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+def test_workers_sharing_a_store_enforce_one_global_limit():
+    LocalStorage("local://shared-test").reset()
+    workers = [
+        TestClient(_worker_app(build_limiter("local://shared-test")), client=("198.51.100.7", 1))
+        for _ in range(2)
+    ]
+
+    statuses = [workers[i % 2].get("/ping").status_code for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_clients_behind_trusted_proxy_get_separate_limits():
+    LocalStorage("local://proxy-test").reset()
+    limiter = build_limiter("local://proxy-test", key_func=ProxyAwareKey(["10.0.0.0/8"]))
+    nginx = TestClient(_worker_app(limiter), client=("10.0.0.5", 1))
+
+    for _ in range(3):
+        assert nginx.get("/ping", headers={"X-Forwarded-For": "198.51.100.7"}).status_code == 200
+    assert nginx.get("/ping", headers={"X-Forwarded-For": "198.51.100.7"}).status_code == 429
+    assert nginx.get("/ping", headers={"X-Forwarded-For": "198.51.100.8"}).status_code == 200
@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.middleware import logging_middleware
+from app.middleware.logging_middleware import LoggingMiddleware
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.events = []
+
+    def info(self, event, **kw):
+        self.events.append((event, kw))
+
+    def error(self, event, **kw):
+        self.events.append((event, kw))
+
+
+@pytest.fixture
+def logger(monkeypatch):
+    recorder = RecordingLogger()
+    monkeypatch.setattr(logging_middleware, "log", recorder)
+    return recorder
+
+
+def _app(**kwargs):
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    async def boom(request):
+        raise RuntimeError("falhou")
+
+    inner = Starlette(routes=[Route("/ok", ok), Route("/boom", boom)])
+    return LoggingMiddleware(inner, **kwargs)
+
+
+def test_each_request_logged_once(client, logger):
+    client.get("/")
+    assert [e for e, _ in logger.events] == ["http.request"]
+    assert logger.events[0][1]["status_code"] == 200
+    assert logger.events[0][1]["path"] == "/"
+
+
+def test_request_id_generated_and_returned(client, logger):
+    response = client.get("/")
+    assert len(response.headers["X-Request-ID"]) == 8
+
+
+def test_incoming_request_id_is_honored(client, logger):
+    response = client.get("/", headers={"X-Request-ID": "abc-123.XYZ"})
+    assert response.headers["X-Request-ID"] == "abc-123.XYZ"
+
+
+def test_invalid_incoming_request_id_is_replaced(client, logger):
+    response = client.get("/", headers={"X-Request-ID": "x" * 200})
+    assert response.headers["X-Request-ID"] != "x" * 200
+
+
+def test_success_logs_are_sampled_errors_are_not(logger):
+    with TestClient(_app(success_sample_rate=0.0)) as c:
+        c.get("/ok")
+        c.get("/ok")
+        c.get("/nao-existe")
+
+    assert [kw["status_code"] for _, kw in logger.events] == [404]
+
+
+def test_sampler_keeps_fraction_of_successes(logger):
+    draws = iter([0.05, 0.5, 0.09, 0.95])
+    with TestClient(_app(success_sample_rate=0.1, sampler=lambda: next(draws))) as c:
+        for _ in range(4):
+            c.get("/ok")
+
+    assert len(logger.events) == 2
+
+
+def test_unhandled_exception_logged(logger):
+    with TestClient(_app(), raise_server_exceptions=False) as c:
+        response = c.get("/boom")
+
+    assert response.status_code == 500
+    assert logger.events[-1][0] == "http.error"
+    assert logger.events[-1][1]["error"] == "falhou"
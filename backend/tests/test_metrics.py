@@ -0,0 +1,117 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from app.core.metrics import Counter, Histogram
+
+
+def _sample(body: str, name: str, **labels) -> float | None:
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in body.splitlines():
+        match = re.fullmatch(rf"{re.escape(name)}(?:\{{(.*)\}})? (\S+)", line)
+        if match and (match.group(1) or "") == wanted:
+            return float(match.group(2))
+    return None
+
+
+NGINX_CONF = Path(__file__).resolve().parents[2] / "nginx" / "nginx.conf"
+
+
+def _nginx_location(path: str) -> str:
+    """Corpo do location que o nginx escolhe para `path` (= exato, depois o prefixo mais longo; o conf não usa regex)."""
+    blocks = re.findall(r"location\s+(=|\^~)?\s*(\S+)\s*\{(.*?)\}", NGINX_CONF.read_text(), re.S)
+    for modifier, prefix, body in blocks:
+        if modifier == "=" and prefix == path:
+            return body
+    matches = [(len(prefix), body) for modifier, prefix, body in blocks if modifier != "=" and path.startswith(prefix)]
+    return max(matches)[1]
+
+
+@pytest.mark.skipif(not NGINX_CONF.exists(), reason="nginx/nginx.conf fica fora do container do backend")
+def test_metrics_not_published_by_nginx():
+    for path in ("/api/metrics", "/api/metrics/"):
+        assert "deny all;" in _nginx_location(path), path
+    assert "proxy_pass http://backend/;" in _nginx_location("/api/products")
+
+
+def test_metrics_endpoint_format(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+def test_latency_labeled_by_route_template(client):
+    for _ in range(3):
+        client.get("/products/00000000-0000-0000-0000-000000000000")
+    client.get("/products/11111111-1111-1111-1111-111111111111")
+    body = client.get("/metrics").text
+
+    route = "/products/{product_id}"
+    assert _sample(body, "http_request_duration_seconds_count", method="GET", route=route) == 4
+    assert _sample(body, "http_requests_total", method="GET", route=route, status="404") == 4
+    assert "00000000-0000" not in body
+
+
+def test_unmatched_paths_share_one_label(client):
+    client.get("/nao-existe/1")
+    client.get("/nao-existe/2")
+    body = client.get("/metrics").text
+    assert _sample(body, "http_requests_total", method="GET", route="<unmatched>", status="404") == 2
+
+
+def test_in_flight_gauge(client):
+    client.get("/")
+    body = client.get("/metrics").text
+    # O próprio scrape está em andamento
+    assert _sample(body, "http_requests_in_flight", method="GET") == 1
+
+
+def test_db_queries_counted_per_request(client):
+    client.post("/categories/", json={"name": "Eletrônicos"})
+    client.get("/categories/")
+    body = client.get("/metrics").text
+
+    assert _sample(body, "http_request_db_queries_count", route="/categories/") == 2
+    assert _sample(body, "http_request_db_queries_sum", route="/categories/") >= 2
+    assert _sample(body, "db_queries_total", engine="async") >= 2
+    assert _sample(body, "db_pool_checkout_duration_seconds_count", engine="async") >= 2
+    assert _sample(body, "http_request_db_queries_sum", route="/") is None
+
+
+def test_cache_stats_exposed(client):
+    created = client.post("/categories/", json={"name": "Redes"}).json()
+    for _ in range(3):
+        client.get(f"/categories/{created['id']}")
+    body = client.get("/metrics").text
+
+    labels = {"cache": "read", "resource": "categories"}
+    assert _sample(body, "cache_hits", **labels) == 2
+    assert _sample(body, "cache_misses", **labels) == 1
+    assert _sample(body, "cache_hit_rate", **labels) == 2 / 3
+    assert _sample(body, "cache_size", **labels) == 1
+    assert _sample(body, "cache_time_saved_seconds", **labels) > 0
+    for name in ("cache_hits", "cache_misses", "cache_hit_rate", "cache_time_saved_seconds", "cache_size"):
+        assert _sample(body, name, cache="token", resource="jwt") is not None
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Teste.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/x")
+
+    lines = list(histogram.samples())
+    assert lines == [
+        'latency_bucket{route="/x",le="0.1"} 1',
+        'latency_bucket{route="/x",le="1"} 3',
+        'latency_bucket{route="/x",le="+Inf"} 4',
+        'latency_sum{route="/x"} 4.25',
+        'latency_count{route="/x"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("hits", "Teste.", ("path",))
+    counter.inc('a"b\\c')
+    assert list(counter.samples()) == ['hits{path="a\\"b\\\\c"} 1']
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 
@@ -127,6 +129,35 @@ def test_delete_product_not_found(client):
     assert response.status_code == 404
 
 
+def test_bulk_delete_products(client, db):
+    from app.crud.dashboard import check_dashboard_stats
+
+    client.get("/dashboard/")
+    ids = [_create_product(client)["id"] for _ in range(4)]
+    response = client.delete(
+        f"/products?ids={ids[0]},{ids[1]},id-inexistente&ids={ids[2]}", follow_redirects=False
+    )
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 3, "not_found": ["id-inexistente"]}
+    assert [p["id"] for p in client.get("/products/").json()] == [ids[3]]
+    assert check_dashboard_stats(db) == []
+
+
+def test_bulk_delete_products_in_chunks(client, monkeypatch):
+    from app.crud import product as crud_product
+
+    monkeypatch.setattr(crud_product, "BULK_CHUNK_SIZE", 2)
+    ids = [_create_product(client)["id"] for _ in range(5)]
+    response = client.request("DELETE", "/products", json=ids + ids[:1], follow_redirects=False)
+    assert response.json() == {"deleted": 5, "not_found": []}
+    assert client.get("/products/").json() == []
+
+
+def test_bulk_delete_products_requires_ids(client):
+    assert client.delete("/products").status_code == 400
+    assert client.delete("/products/").status_code == 400
+
+
 def test_low_stock_products(client):
     client.post("/products/", json={**PRODUCT_PAYLOAD, "stock": 5})
     client.post("/products/", json={**PRODUCT_PAYLOAD, "stock": 15})
@@ -142,3 +173,282 @@ def test_low_stock_empty(client):
     response = client.get("/products/low-stock")
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_list_products_ordered_by_name(client):
+    for name in ["Zeta", "Alpha", "Mu"]:
+        client.post("/products/", json={**PRODUCT_PAYLOAD, "name": name})
+    response = client.get("/products/")
+    assert [p["name"] for p in response.json()] == ["Alpha", "Mu", "Zeta"]
+
+
+def test_list_products_cursor_pagination(client):
+    for i in range(5):
+        client.post("/products/", json={**PRODUCT_PAYLOAD, "name": f"Produto {i}"})
+
+    first = client.get("/products/?limit=2")
+    assert [p["name"] for p in first.json()] == ["Produto 0", "Produto 1"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f"/products/?limit=2&cursor={cursor}")
+    assert [p["name"] for p in second.json()] == ["Produto 2", "Produto 3"]
+
+    third = client.get(f"/products/?limit=2&cursor={second.headers['X-Next-Cursor']}")
+    assert [p["name"] for p in third.json()] == ["Produto 4"]
+    assert "X-Next-Cursor" not in third.headers
+
+
+def test_list_products_cursor_with_filters(client):
+    cat = _create_category(client)
+    for i in range(3):
+        client.post("/products/", json={**PRODUCT_PAYLOAD, "name": f"Mac {i}", "category_id": cat["id"]})
+    client.post("/products/", json={**PRODUCT_PAYLOAD, "name": "Mac fora da categoria"})
+    client.post("/products/", json={**PRODUCT_PAYLOAD, "name": "Dell XPS", "category_id": cat["id"]})
+
+    first = client.get(f"/products/?limit=2&search=mac&category_id={cat['id']}&cursor=")
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/products/?limit=2&search=mac&category_id={cat['id']}&cursor={cursor}")
+    names = [p["name"] for p in first.json() + second.json()]
+    assert names == ["Mac 0", "Mac 1", "Mac 2"]
+
+
+def test_search_cursor_pages_return_every_match_once(client):
+    for name in ["Mousepad", "Mouse Zeta", "Mouse Beta", "Mouse Alpha", "Mouse"]:
+        client.post("/products/", json={**PRODUCT_PAYLOAD, "name": name})
+
+    # Página por relevância: ordem diferente de (name, id), então sem cursor
+    ranked = client.get("/products/?search=mouse&limit=2")
+    assert "X-Next-Cursor" not in ranked.headers
+
+    names, cursor = [], ""
+    while cursor is not None:
+        page = client.get(f"/products/?search=mouse&limit=2&cursor={cursor}")
+        names += [p["name"] for p in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+    assert names == ["Mouse", "Mouse Alpha", "Mouse Beta", "Mouse Zeta", "Mousepad"]
+
+
+def test_list_products_invalid_cursor(client):
+    response = client.get("/products/?cursor=nao-e-um-cursor")
+    assert response.status_code == 400
+
+
+def test_list_products_search_ranked_by_relevance(client):
+    for name in ["Capa para MacBook Air M3 13 polegadas", "MacBook", "MacBook Air"]:
+        client.post("/products/", json={**PRODUCT_PAYLOAD, "name": name})
+    response = client.get("/products/?search=macbook")
+    assert [p["name"] for p in response.json()] == [
+        "MacBook",
+        "MacBook Air",
+        "Capa para MacBook Air M3 13 polegadas",
+    ]
+
+
+def test_list_products_search_escapes_wildcards(client):
+    _create_product(client)
+    client.post("/products/", json={**PRODUCT_PAYLOAD, "name": "Desconto 100% off"})
+    response = client.get("/products/?search=%25")
+    assert [p["name"] for p in response.json()] == ["Desconto 100% off"]
+
+
+def test_adjust_stock_batch(client):
+    a = client.post("/products/", json={**PRODUCT_PAYLOAD, "stock": 10}).json()
+    b = client.post("/products/", json={**PRODUCT_PAYLOAD, "stock": 2}).json()
+
+    response = client.patch("/products/stock", json=[
+        {"id": a["id"], "delta": -4},
+        {"id": b["id"], "delta": -5},
+        {"id": b["id"], "absolute": 30},
+        {"id": "id-inexistente", "delta": 1},
+    ])
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": a["id"], "status": "ok", "stock": 6},
+        {"id": b["id"], "status": "insufficient_stock", "stock": None},
+        {"id": b["id"], "status": "ok", "stock": 30},
+        {"id": "id-inexistente", "status": "not_found", "stock": None},
+    ]
+    assert client.get(f"/products/{a['id']}").json()["stock"] == 6
+    assert client.get(f"/products/{b['id']}").json()["stock"] == 30
+
+
+def test_adjust_stock_batch_requires_exactly_one_operation(client):
+    created = _create_product(client)
+    both = client.patch("/products/stock", json=[{"id": created["id"], "delta": 1, "absolute": 3}])
+    neither = client.patch("/products/stock", json=[{"id": created["id"]}])
+    assert both.status_code == 422
+    assert neither.status_code == 422
+
+
+def test_adjust_stock_batch_keeps_dashboard_consistent(client, db):
+    from app.crud.dashboard import check_dashboard_stats
+
+    client.get("/dashboard/")
+    created = client.post("/products/", json={**PRODUCT_PAYLOAD, "stock": 20}).json()
+    client.patch("/products/stock", json=[{"id": created["id"], "delta": -15}, {"id": created["id"], "absolute": 8}])
+
+    assert check_dashboard_stats(db) == []
+    assert client.get("/dashboard/").json()["low_stock_count"] == 1
+
+
+def test_adjust_stock_batch_concurrent_deltas_are_not_lost(client):
+    import asyncio
+
+    import httpx
+
+    from app.main import app
+
+    created = client.post("/products/", json={**PRODUCT_PAYLOAD, "stock": 0}).json()
+    batch = [{"id": created["id"], "delta": 1}] * 5
+
+    async def hammer():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            responses = await asyncio.gather(*(ac.patch("/products/stock", json=batch) for _ in range(20)))
+        return [r.status_code for r in responses]
+
+    assert asyncio.run(hammer()) == [200] * 20
+    assert client.get(f"/products/{created['id']}").json()["stock"] == 100
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URL"),
+    reason="Precisa de PostgreSQL: defina TEST_POSTGRES_URL apontando para um banco descartável",
+)
+def test_adjust_stock_batch_opposite_orders_do_not_deadlock():
+    """Lotes com os mesmos produtos em ordens opostas, ao mesmo tempo. Só o PostgreSQL tem row locks."""
+    import asyncio
+
+    import httpx
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import Session
+
+    from app.core.auth import require_auth
+    from app.core.database import Base, get_async_db, to_async_url
+    from app.crud.dashboard import check_dashboard_stats
+    from app.main import app
+
+    url = os.environ["TEST_POSTGRES_URL"]
+    sync_engine = create_engine(url)
+    with sync_engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.drop_all(sync_engine)
+    Base.metadata.create_all(sync_engine)
+    engine = create_async_engine(to_async_url(url), pool_size=20, max_overflow=0)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def pg_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = pg_db
+    app.dependency_overrides[require_auth] = lambda: {"sub": "test-user"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            ids = [
+                (await ac.post("/products/", json={**PRODUCT_PAYLOAD, "name": f"Produto {i}", "stock": 0})).json()["id"]
+                for i in range(4)
+            ]
+            await ac.get("/dashboard/")  # materializa dashboard_stats: o lote também trava essa linha
+            forward = [{"id": pid, "delta": 1} for pid in ids] + [{"id": ids[0], "absolute": 0}]
+            backward = [{"id": pid, "delta": 1} for pid in reversed(ids)] + [{"id": ids[-1], "absolute": 0}]
+            responses = await asyncio.gather(
+                *(ac.patch("/products/stock", json=forward if i % 2 else backward) for i in range(20))
+            )
+            stocks = [(await ac.get(f"/products/{pid}")).json()["stock"] for pid in ids]
+        await engine.dispose()
+        return [r.status_code for r in responses], responses[0].json(), ids, stocks
+
+    try:
+        statuses, first, ids, stocks = asyncio.run(scenario())
+        with Session(sync_engine) as db:
+            inconsistencies = check_dashboard_stats(db)
+    finally:
+        app.dependency_overrides.clear()
+        Base.metadata.drop_all(sync_engine)
+        sync_engine.dispose()
+
+    assert statuses == [200] * 20
+    # resultados na ordem do payload, mesmo com as linhas travadas em ordem de id
+    assert [r["id"] for r in first] == [*reversed(ids), ids[-1]]
+    assert stocks[1:3] == [20, 20]
+    assert inconsistencies == []
+
+
+def test_product_endpoints_query_budget(client, assert_max_queries):
+    cat = _create_category(client)
+    client.get("/dashboard/")  # materializa dashboard_stats: as escritas passam a atualizá-lo
+    product = _create_product(client, cat["id"])
+    pid = product["id"]
+
+    with assert_max_queries(1):
+        client.get("/products/")
+    with assert_max_queries(1):
+        client.get("/products/?search=mac")
+    with assert_max_queries(1):
+        client.get(f"/products/?category_id={cat['id']}&cursor=")
+    with assert_max_queries(1):
+        client.get(f"/products/{pid}")
+    with assert_max_queries(1):
+        client.get("/products/low-stock")
+    # Escritas: o statement da linha + agregados do dashboard; nada de refresh depois do commit
+    with assert_max_queries(3):
+        client.post("/products/", json={**PRODUCT_PAYLOAD, "category_id": cat["id"]})
+    with assert_max_queries(3):
+        patched = client.patch(f"/products/{pid}", json={"price": 99.9})
+    assert patched.headers["etag"] == '"2"'  # version do próprio UPDATE, não de um SELECT
+    with assert_max_queries(3):
+        client.patch(f"/products/{pid}/stock", json={"stock": 3})
+    with assert_max_queries(3):
+        client.patch("/products/stock", json=[{"id": pid, "delta": 1}])
+    # DELETE ... RETURNING + agregados do dashboard (geral e da categoria)
+    with assert_max_queries(3):
+        client.delete(f"/products/{pid}")
+    with assert_max_queries(1):
+        assert client.delete(f"/products/{pid}").status_code == 404
+    ids = ",".join(_create_product(client, cat["id"])["id"] for _ in range(3))
+    with assert_max_queries(3):
+        client.delete(f"/products/?ids={ids}")
+
+
+def test_list_products_expand_category(client, assert_max_queries):
+    cat = _create_category(client)
+    other = client.post("/categories/", json={"name": "Monitores"}).json()
+    _create_product(client, cat["id"])
+    client.post("/products/", json={**PRODUCT_PAYLOAD, "name": "Monitor 27", "category_id": other["id"]})
+    client.post("/products/", json={**PRODUCT_PAYLOAD, "name": "Sem categoria"})
+
+    with assert_max_queries(2):
+        response = client.get("/products/?expand=category")
+    assert response.status_code == 200
+    by_name = {p["name"]: p for p in response.json()}
+    assert by_name["MacBook Air M3"]["category"] == {"id": cat["id"], **CATEGORY}
+    assert by_name["Monitor 27"]["category"]["name"] == "Monitores"
+    assert by_name["Sem categoria"]["category"] is None
+
+
+def test_list_products_without_expand_has_no_category_field(client):
+    cat = _create_category(client)
+    _create_product(client, cat["id"])
+    assert "category" not in client.get("/products/").json()[0]
+
+
+def test_get_product_expand_category(client, assert_max_queries):
+    cat = _create_category(client)
+    product = _create_product(client, cat["id"])
+
+    with assert_max_queries(1):
+        response = client.get(f"/products/{product['id']}?expand=category")
+    assert response.json()["category"]["name"] == CATEGORY["name"]
+    assert "category" not in client.get(f"/products/{product['id']}").json()
+
+    # Renomear a categoria invalida a versão expandida em cache
+    client.patch(f"/categories/{cat['id']}", json={"name": "Ultrabooks"})
+    assert client.get(f"/products/{product['id']}?expand=category").json()["category"]["name"] == "Ultrabooks"
+
+
+def test_expand_rejects_unknown_relation(client):
+    assert client.get("/products/?expand=fornecedor").status_code == 422
@@ -0,0 +1,85 @@
+import json
+
+
+CSV_HEADER = "name,description,price,stock,category_id\n"
+
+
+def _ndjson(*rows):
+    return "\n".join(json.dumps(r) for r in rows) + "\n"
+
+
+def test_bulk_import_csv(client):
+    body = (
+        CSV_HEADER
+        + "Teclado,Mecânico,199.90,10,\n"
+        + '"Mouse, sem fio","Linha 1\nLinha 2",99.00,3,\n'
+    )
+    response = client.post("/products/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 2, "failed": 0, "errors": []}
+
+    products = client.get("/products/").json()
+    assert [p["name"] for p in products] == ["Mouse, sem fio", "Teclado"]
+    assert products[0]["description"] == "Linha 1\nLinha 2"
+    assert products[1]["description"] == "Mecânico"
+
+
+def test_bulk_import_reports_row_errors_without_aborting(client):
+    cat = client.post("/categories/", json={"name": "Redes"}).json()
+    body = _ndjson(
+        {"name": "Roteador", "price": 300, "stock": 5, "category_id": cat["id"]},
+        {"name": "X", "price": 10, "stock": 1},
+        {"name": "Switch", "price": -1, "stock": 1},
+        {"name": "Cabo", "price": 20, "stock": 1, "category_id": "nao-existe"},
+    ) + "{nao e json}\n" + _ndjson({"name": "Antena", "price": 50, "stock": 0})
+
+    response = client.post("/products/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 4
+    assert [e["line"] for e in data["errors"]] == [2, 3, 4, 5]
+    assert data["errors"][0]["error"].startswith("name:")
+    assert "nao-existe" in data["errors"][2]["error"]
+
+
+def test_bulk_import_commits_in_batches(client, monkeypatch):
+    from app.crud import product as crud_product
+
+    batches = []
+    insert_batch = crud_product._insert_batch
+
+    async def counting_insert_batch(db, batch, *args):
+        batches.append(len(batch))
+        await insert_batch(db, batch, *args)
+
+    monkeypatch.setattr(crud_product, "BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(crud_product, "_insert_batch", counting_insert_batch)
+    rows = [{"name": f"Produto {i}", "price": 10, "stock": i} for i in range(5)]
+    response = client.post("/products/bulk?format=ndjson", content=_ndjson(*rows))
+    assert response.json()["inserted"] == 5
+    assert batches == [2, 2, 1]
+    assert len(client.get("/products/").json()) == 5
+
+
+def test_bulk_import_csv_column_mismatch(client):
+    body = CSV_HEADER + "Só nome\n"
+    response = client.post("/products/bulk?format=csv", content=body)
+    assert response.json()["errors"] == [{"line": 2, "error": "Esperadas 5 colunas, encontradas 1."}]
+
+
+def test_bulk_import_updates_dashboard(client, db):
+    from app.crud.dashboard import check_dashboard_stats
+
+    client.get("/dashboard/")
+    body = _ndjson({"name": "Mouse", "price": 50, "stock": 2}, {"name": "Monitor", "price": 900, "stock": 20})
+    client.post("/products/bulk?format=ndjson", content=body)
+
+    assert check_dashboard_stats(db) == []
+    dashboard = client.get("/dashboard/").json()
+    assert dashboard["total_products"] == 2
+    assert dashboard["low_stock_count"] == 1
+
+
+def test_bulk_import_unsupported_format(client):
+    response = client.post("/products/bulk", content="{}", headers={"Content-Type": "application/json"})
+    assert response.status_code == 415
@@ -0,0 +1,181 @@
+import csv
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from app.crud import product as crud_product
+
+
+def _create(client, name, stock=5, category_id=None):
+    return client.post(
+        "/products/", json={"name": name, "price": 10.5, "stock": stock, "category_id": category_id}
+    ).json()
+
+
+def test_export_ndjson(client):
+    for name in ("Teclado", "Mouse", "Monitor"):
+        _create(client, name)
+
+    response = client.get("/products/export", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [p["name"] for p in lines] == ["Monitor", "Mouse", "Teclado"]
+    assert lines[0] == client.get(f"/products/{lines[0]['id']}").json()
+
+
+def test_export_csv_round_trips_through_bulk_import(client):
+    _create(client, "Cabo HDMI", stock=0)
+    response = client.get("/products/export?format=csv")
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert rows[0]["name"] == "Cabo HDMI"
+    assert rows[0]["category_id"] == ""
+
+    imported = client.post("/products/bulk", content=response.content, headers={"Content-Type": "text/csv"})
+    assert imported.json()["inserted"] == 1
+
+
+def test_export_filters(client):
+    cat = client.post("/categories/", json={"name": "Áudio"}).json()
+    _create(client, "Fone Bluetooth", category_id=cat["id"])
+    _create(client, "Fone com fio")
+    _create(client, "Caixa de som", category_id=cat["id"])
+
+    by_search = client.get("/products/export?search=fone").text.splitlines()
+    assert len(by_search) == 2
+    by_category = client.get(f"/products/export?category_id={cat['id']}&search=fone").text.splitlines()
+    assert [json.loads(line)["name"] for line in by_category] == ["Fone Bluetooth"]
+
+
+def test_export_gzip(client):
+    _create(client, "Webcam")
+    # iter_raw: os bytes como vieram do servidor, antes da descompressão automática do httpx
+    with client.stream("GET", "/products/export", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert raw[:2] == b"\x1f\x8b"
+    assert json.loads(gzip.decompress(raw))["name"] == "Webcam"
+
+
+def test_export_streams_in_chunks(client, monkeypatch):
+    monkeypatch.setattr(crud_product, "EXPORT_CHUNK_SIZE", 2)
+    real_stream = crud_product.stream_products
+    partitions = []
+
+    async def spy(*args, **kwargs):
+        async for rows in real_stream(*args, **kwargs):
+            partitions.append(len(rows))
+            yield rows
+
+    monkeypatch.setattr(crud_product, "stream_products", spy)
+    for i in range(5):
+        _create(client, f"Produto {i}")
+
+    assert client.get("/products/export").text.count("\n") == 5
+    assert partitions == [2, 2, 1]
+
+
+def test_export_empty_csv_has_header(client):
+    assert client.get("/products/export?format=csv").text.strip() == "name,description,price,stock,category_id,id"
+
+
+_RSS_SCRIPT = textwrap.dedent(
+    """
+    import asyncio, os, resource, sys, uuid
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    rows, path = int(sys.argv[1]), sys.argv[2]
+    from app.core.database import Base, get_async_db
+    from app.core.limiter import limiter
+    from app.core.logging import configure_logging
+    from app.main import app
+    from app.models.product import Product
+
+    configure_logging("WARNING")
+    limiter.enabled = False
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        batch = []
+        for i in range(rows):
+            batch.append({"id": str(uuid.UUID(int=i)), "name": f"Produto {i:07d}", "price": 9.99, "stock": i % 100})
+            if len(batch) == 50_000:
+                conn.execute(insert(Product), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Product), batch)
+    engine.dispose()
+
+    sessions = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False)
+
+    async def db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = db
+
+    async def export():
+        received = lines = 0
+        scope = {"type": "http", "method": "GET", "path": "/products/export", "raw_path": b"/products/export",
+                 "query_string": b"format=ndjson", "headers": [], "client": ("127.0.0.1", 1), "server": ("t", 80),
+                 "scheme": "http", "http_version": "1.1", "root_path": ""}
+
+        done = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()  # o cliente só "desconecta" depois do fim da resposta
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal received, lines
+            if message["type"] == "http.response.body":
+                received += len(message.get("body", b""))
+                lines += message.get("body", b"").count(b"\\n")
+                if not message.get("more_body", False):
+                    done.set()
+
+        await app(scope, receive, send)
+        return lines
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    lines = asyncio.run(export())
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(lines, before, after)
+    """
+)
+
+
+@pytest.mark.skipif(
+    not os.getenv("EXPORT_RSS_ROWS"),
+    reason="Teste lento: defina EXPORT_RSS_ROWS (ex.: 1000000) para rodar",
+)
+def test_export_peak_rss_stays_bounded(tmp_path):
+    rows = int(os.environ["EXPORT_RSS_ROWS"])
+    backend_dir = Path(__file__).resolve().parent.parent
+    result = subprocess.run(
+        [sys.executable, "-c", _RSS_SCRIPT, str(rows), str(tmp_path / "export.db")],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'export.db'}"},
+    )
+    lines, before_kb, after_kb = map(int, result.stdout.split()[-3:])
+    assert lines == rows
+    # O pico durante a exportação não pode crescer com o tamanho da tabela
+    assert (after_kb - before_kb) < 64 * 1024, f"RSS cresceu {(after_kb - before_kb) // 1024} MB"
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.query_debug import normalize_statement, repeated_statements
+from app.middleware import metrics_middleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, event, **kw):
+        self.warnings.append((event, kw))
+
+
+def test_normalize_statement_collapses_whitespace_and_in_lists():
+    a = normalize_statement("SELECT *\n  FROM products WHERE id IN (?, ?, ?)")
+    b = normalize_statement("SELECT * FROM products WHERE id IN (?)")
+    assert a == b == "SELECT * FROM products WHERE id IN (?...)"
+
+
+def test_repeated_statements_threshold():
+    statements = ["SELECT 1 WHERE id = ?"] * 3 + ["SELECT 2"] * 2
+    assert repeated_statements(statements) == {"SELECT 1 WHERE id = ?": 3}
+
+
+def test_db_queries_header(client):
+    response = client.get("/products/")
+    assert response.headers["X-DB-Queries"] == "1"
+    assert client.get("/").headers["X-DB-Queries"] == "0"
+
+
+def test_n_plus_one_is_logged(monkeypatch):
+    logger = RecordingLogger()
+    monkeypatch.setattr(metrics_middleware, "log", logger)
+
+    async def loop_queries(request):
+        async with TestingAsyncSessionLocal() as db:
+            for i in range(4):
+                await db.execute(text("SELECT :i"), {"i": i})
+        return PlainTextResponse("ok")
+
+    app = MetricsMiddleware(Starlette(routes=[Route("/loop", loop_queries)]), query_debug=True)
+    with TestClient(app) as c:
+        response = c.get("/loop")
+
+    assert response.headers["X-DB-Queries"] == "4"
+    [(event, data)] = logger.warnings
+    assert event == "db.n_plus_one"
+    assert data["count"] == 4
+
+
+def test_assert_max_queries_reports_statements(client, assert_max_queries):
+    with pytest.raises(AssertionError, match="1 queries executadas, orçamento era 0"):
+        with assert_max_queries(0):
+            client.get("/products/")
@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.crud.dashboard import check_dashboard_stats
+from app.models.category import Category
+from app.models.product import Product
+from app.models.user import User
+from seed import generate
+
+
+def _engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _snapshot(engine):
+    with Session(engine) as db:
+        return (
+            db.execute(select(Category.id, Category.name).order_by(Category.id)).all(),
+            db.execute(
+                select(Product.id, Product.name, Product.price, Product.stock, Product.category_id).order_by(Product.id)
+            ).all(),
+            db.execute(select(User.id, User.email).order_by(User.id)).all(),
+        )
+
+
+def test_generate_is_deterministic_and_keeps_dashboard_consistent(tmp_path):
+    first, second = _engine(tmp_path / "a.db"), _engine(tmp_path / "b.db")
+    assert generate(first, products=300, categories=12, users=20, batch_size=100) == {
+        "categories": 12,
+        "products": 300,
+        "users": 20,
+    }
+    generate(second, products=300, categories=12, users=20, batch_size=100)
+
+    categories, products, users = _snapshot(first)
+    assert _snapshot(second) == (categories, products, users)
+    assert len({name for _, name in categories}) == 12
+    assert any(category_id is None for *_, category_id in products)
+    with Session(first) as db:
+        assert check_dashboard_stats(db) == []
+
+
+def test_generate_is_idempotent_and_completes_to_the_requested_total(tmp_path):
+    engine = _engine(tmp_path / "seed.db")
+    generate(engine, products=100, categories=5, users=0)
+    assert generate(engine, products=100, categories=5, users=0) == {"categories": 0, "products": 0, "users": 0}
+
+    assert generate(engine, products=250, categories=5, users=0)["products"] == 150
+    direct = _engine(tmp_path / "direct.db")
+    generate(direct, products=250, categories=5, users=0)
+    assert _snapshot(engine) == _snapshot(direct)
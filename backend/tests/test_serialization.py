@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+
+from app.core.serialization import RowListSerializer
+from app.models.product import Product
+from app.schemas.product import ProductResponse
+from app.schemas.user import UserResponse
+
+
+def test_row_serializer_matches_pydantic_output():
+    records = [
+        {"id": "p1", "name": "Teclado", "description": None, "price": Decimal("199.90"), "stock": 3, "category_id": None},
+        {"id": "p2", "name": "Mouse", "description": "Sem fio", "price": Decimal("89.00"), "stock": 0, "category_id": "c1"},
+    ]
+    serializer = RowListSerializer(ProductResponse)
+    rows = [tuple(r[f] for f in serializer.fields) for r in records]
+    models = [ProductResponse(**r) for r in records]
+
+    assert serializer.dump_json(rows) == TypeAdapter(list[ProductResponse]).dump_json(models)
+
+
+def test_columns_follow_schema_fields():
+    serializer = RowListSerializer(ProductResponse)
+    assert [c.key for c in serializer.columns(Product)] == list(ProductResponse.model_fields)
+
+
+def test_sensitive_columns_are_not_selected():
+    assert "keycloak_id" not in RowListSerializer(UserResponse).fields
+
+
+def test_list_endpoints_return_same_shape(client):
+    client.post("/products/", json={"name": "Teclado", "price": 199.9, "stock": 3})
+    client.post("/users/", json={"full_name": "Ana Lima", "email": "ana@example.com", "keycloak_id": "kc-9"})
+    client.post("/categories/", json={"name": "Periféricos"})
+
+    product = client.get("/products/").json()[0]
+    assert set(product) == set(ProductResponse.model_fields)
+    assert product == client.get(f"/products/{product['id']}").json()
+
+    user = client.get("/users/").json()[0]
+    assert user == client.get(f"/users/{user['id']}").json()
+
+    category = client.get("/categories/").json()[0]
+    assert category == client.get(f"/categories/{category['id']}").json()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import main
+from app.core.config import Settings, settings
+from app.core.database import warm_pool
+from app import serve
+from app.serve import parse_args, uvicorn_options
+
+
+def test_workers_default_to_cpu_count(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 6)
+    assert Settings(workers=0, db_max_connections=0).worker_count == 6
+    assert Settings(workers=0, db_max_connections=200).worker_count == 6
+    assert Settings(workers=2).worker_count == 2
+    # Orçamento de 80 conexões com 10 + 10 por worker: no máximo 4 workers
+    assert Settings(workers=0).worker_count == 4
+    assert Settings(workers=0, db_pool_size=50).worker_count == 1
+
+    assert uvicorn_options(parse_args([]))["workers"] == settings.worker_count
+    assert uvicorn_options(parse_args(["--workers", "3"]))["workers"] == 3
+
+
+def test_serve_refuses_to_exceed_db_budget(monkeypatch):
+    monkeypatch.setattr(settings, "workers", settings.workers)  # main() sobrescreve; restaurado no teardown
+    monkeypatch.setattr(settings, "db_pool_size", 10)
+    monkeypatch.setattr(settings, "db_max_overflow", 10)
+    monkeypatch.setattr(settings, "db_max_connections", 80)
+    monkeypatch.setenv("WORKERS", "0")
+    monkeypatch.setattr(uvicorn, "run", lambda *args, **kwargs: pytest.fail("não deveria subir o servidor"))
+
+    with pytest.raises(SystemExit, match="100 conexões, acima de DB_MAX_CONNECTIONS=80"):
+        serve.main(["--workers", "5"])
+
+
+def test_rate_limit_per_process_with_several_workers(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_storage_uri", "local://")
+    assert serve.rate_limit_per_process(4)
+    assert not serve.rate_limit_per_process(1)
+
+    monkeypatch.setattr(settings, "rate_limit_storage_uri", "redis://redis:6379/0")
+    assert not serve.rate_limit_per_process(4)
+
+    monkeypatch.setattr(settings, "rate_limit_storage_uri", "memory://")
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    assert not serve.rate_limit_per_process(4)
+
+
+def test_uvicorn_options_for_production_and_reload():
+    options = uvicorn_options(parse_args(["--workers", "4"]))
+    assert options["loop"] == options["http"] == "auto"
+    assert options["timeout_graceful_shutdown"] == settings.graceful_timeout
+    assert options["reload"] is False
+
+    dev = uvicorn_options(parse_args(["--workers", "4", "--reload"]))
+    assert dev["reload"] is True
+    assert dev["workers"] == 1
+
+
+def test_warm_pool_leaves_pool_size_connections_idle(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'warm.db'}", poolclass=AsyncAdaptedQueuePool, pool_size=3
+    )
+
+    async def warm():
+        try:
+            opened = await warm_pool(engine)
+            return opened, engine.pool.checkedin()
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(warm()) == (3, 3)
+
+
+def test_startup_survives_warmup_failures(monkeypatch):
+    async def unreachable(*args, **kwargs):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(settings, "warmup", True)
+    monkeypatch.setattr(main, "warm_pool", unreachable)
+    monkeypatch.setattr(main.jwks_manager, "refresh", unreachable)
+    with TestClient(main.app) as client:
+        assert client.get("/").status_code == 200
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_serve_starts_workers_and_stops_cleanly_on_sigterm(tmp_path):
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'serve.db'}", "WARMUP_TIMEOUT": "2"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", "2"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, "servidor não subiu"
+                time.sleep(0.1)
+        assert response.status_code == 200
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
@@ -16,6 +16,20 @@ def test_create_user_duplicate_email(client):
     assert response.status_code == 409
 
 
+def test_create_user_is_a_single_statement(client, assert_max_queries):
+    with assert_max_queries(1):
+        created = client.post("/users/", json=USER_PAYLOAD)
+    assert created.json()["is_active"] is True
+    with assert_max_queries(1):
+        assert client.post("/users/", json=USER_PAYLOAD).status_code == 409
+
+
+def test_concurrent_signups_with_same_email(client, concurrent_requests):
+    statuses = concurrent_requests("POST", "/users/", 5, json={"full_name": "Ana", "email": "ana@example.com"})
+    assert statuses == [201, 409, 409, 409, 409]
+    assert len(client.get("/users/").json()) == 1
+
+
 def test_list_users_empty(client):
     response = client.get("/users/")
     assert response.status_code == 200
@@ -61,3 +75,36 @@ def test_delete_user(client):
 def test_delete_user_not_found(client):
     response = client.delete("/users/id-inexistente")
     assert response.status_code == 404
+
+
+def test_list_users_cursor_pagination(client):
+    for i in range(3):
+        client.post("/users/", json={**USER_PAYLOAD, "email": f"user{i}@example.com", "keycloak_id": f"kc-{i}"})
+
+    first = client.get("/users/?limit=2")
+    second = client.get(f"/users/?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    ids = [u["id"] for u in first.json() + second.json()]
+    assert len(ids) == 3
+    assert ids == sorted(ids)
+
+
+def test_list_users_invalid_cursor(client):
+    response = client.get("/users/?cursor=%%%")
+    assert response.status_code == 400
+
+
+def test_user_endpoints_query_budget(client, assert_max_queries):
+    with assert_max_queries(1):
+        user = client.post("/users/", json=USER_PAYLOAD).json()
+
+    with assert_max_queries(1):
+        client.get("/users/")
+    with assert_max_queries(1):
+        client.get(f"/users/{user['id']}")
+    with assert_max_queries(2):
+        patched = client.patch(f"/users/{user['id']}", json={"full_name": "João S."})
+    assert patched.headers["etag"] == '"2"'
+    with assert_max_queries(1):
+        client.delete(f"/users/{user['id']}")
+    with assert_max_queries(1):
+        assert client.delete(f"/users/{user['id']}").status_code == 404